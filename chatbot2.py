@@ -1,18 +1,24 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import google.generativeai as genai
-from pymongo import MongoClient
-from datetime import datetime
 from dotenv import load_dotenv
 load_dotenv()
 import os
-import pyttsx3
+import base64
 import numpy as np
-from fpdf import FPDF
-from gtts import gTTS
+import pandas as pd
 import os
 import threading
 import time
 import speech_recognition as sr
+import mongo
+from pymongo.errors import PyMongoError
+from planner import PlanGenerator
+from plan_jobs import PlanJobQueue, FAILED, new_session_id
+from projection import project, scenario_grid
+from monte_carlo import simulate_plan
+from pdf_report import PDFRenderer
+from tts import TTSService, CANCELLED
 
 
 
@@ -23,30 +29,91 @@ if 'is_speaking' not in st.session_state:
     st.session_state.is_speaking = False
 
 
-# Modified TTS functions
+@st.cache_resource
+def get_tts():
+    # Synthesis runs in worker processes, audio is cached by text
+    return TTSService()
+
+
+# Plays audio segments one after another in the page itself, so segments
+# rendered on later script runs queue up behind the one already playing
+SEGMENT_PLAYER = """
+<script>
+const page = window.parent;
+page.ttsQueue = page.ttsQueue || [];
+page.ttsQueued = page.ttsQueued || {};
+const playNext = () => {
+    if (page.ttsCurrent && !page.ttsCurrent.paused && !page.ttsCurrent.ended) return;
+    const next = page.ttsQueue.shift();
+    if (next) { page.ttsCurrent = next; next.onended = playNext; next.play(); }
+};
+if (!page.ttsQueued["SEGMENT_ID"]) {
+    page.ttsQueued["SEGMENT_ID"] = true;
+    page.ttsQueue.push(new page.Audio("data:audio/FORMAT;base64,AUDIO"));
+    playNext();
+}
+</script>
+"""
+
+STOP_PLAYER = """
+<script>
+const page = window.parent;
+page.ttsQueue = [];
+if (page.ttsCurrent) page.ttsCurrent.pause();
+</script>
+"""
+
+
 def text_to_speech(text):
-    if "speech_active" not in st.session_state:
-        st.session_state.speech_active = False
+    """Start synthesizing `text` in chunks; render_speech plays them as they are ready"""
+    st.session_state.tts_jobs = get_tts().submit_chunks(text)
+    st.session_state.tts_emitted = 0
+    st.session_state.tts_play_id = new_session_id()
+    st.session_state.is_speaking = True
 
-    engine = pyttsx3.init()
 
-    if st.session_state.speech_active:
-        engine.stop()  # Stop the current speech
-        st.session_state.speech_active = False
-    else:
-        st.session_state.speech_active = True
-        engine.say(text)
-        engine.runAndWait()
-        st.session_state.speech_active = False
 def stop_speech():
     """Stop ongoing speech"""
-    if st.session_state.is_speaking:
-        try:
-            engine = pyttsx3.init()
-            engine.stop()
-            st.session_state.is_speaking = False
-        except:
-            pass
+    get_tts().cancel_all(st.session_state.get("tts_jobs") or [])
+    st.session_state.tts_jobs = []
+    st.session_state.is_speaking = False
+    components.html(STOP_PLAYER, height=0)
+
+
+def render_speech():
+    """Queue each synthesized chunk for playback in order, waiting for the rest.
+
+    Chunks already handed to the page's player are not sent again on later
+    runs, and once the last one is queued speech is no longer pending.
+    """
+    job_ids = st.session_state.get("tts_jobs")
+    if not job_ids:
+        return
+    if st.button("⏹️ Stop Speech", key="stop_speech_pending"):
+        stop_speech()
+        return
+    status = st.empty()
+    emitted = st.session_state.get("tts_emitted", 0)
+    for i, job_id in enumerate(job_ids[emitted:], start=emitted):
+        job = get_tts().wait(job_id, on_poll=lambda: status.caption(
+            f"🔊 Preparing audio ({i}/{len(job_ids)} parts ready)..."))
+        if job is None or job["status"] == CANCELLED:
+            break
+        if job["status"] == FAILED:
+            st.error(f"Text-to-speech failed: {job['error']}")
+            break
+        components.html(SEGMENT_PLAYER
+                        .replace("SEGMENT_ID", f"{st.session_state.tts_play_id}-{i}")
+                        .replace("FORMAT", job["format"])
+                        .replace("AUDIO", base64.b64encode(job["audio"]).decode()), height=0)
+        st.session_state.tts_emitted = i + 1
+    # Every chunk is with the player, or the rest failed or was cancelled;
+    # a rerun while waiting never gets here and picks up where it left off
+    st.session_state.tts_jobs = []
+    st.session_state.is_speaking = False
+    status.empty()
+
+
 def speech_to_text():
     """Convert speech to text using Google's Speech Recognition"""
     r = sr.Recognizer()
@@ -64,57 +131,55 @@ def speech_to_text():
             st.session_state.is_recording = False
 
 
+@st.cache_resource
+def get_pdf_renderer():
+    # Font parsed once per process, reports cached by plan contents
+    return PDFRenderer()
+
+
 def generate_pdf(financial_plan):
-    pdf = FPDF()
-    pdf.add_page()
-
-    # Add Unicode font
-    pdf.add_font('DejaVu', '', 'DejaVuSans.ttf', uni=True)
-    pdf.set_font('DejaVu', '', 12)
-
-    # Title with Rupee symbol
-    pdf.cell(200, 10, txt="Financial Plan Report".encode('latin-1').decode('latin-1'), ln=True, align='C')
-    pdf.ln(10)
-
-    # Format content
-    fields = [
-        ("Name", financial_plan.get("name", "")),
-        ("Monthly Income", f'₹{financial_plan.get("income", 0):,.2f}'),
-        ("Monthly Expenses", f'₹{financial_plan.get("expenses", 0):,.2f}'),
-        ("Financial Goal", financial_plan.get("goal_description", "")),
-        ("Target Amount", f'₹{financial_plan.get("goal_amount", 0):,.2f}'),
-        ("Adjusted Target", f'₹{financial_plan.get("adjusted_goal_amount", 0):,.2f}'),
-        ("Timeframe", f'{financial_plan.get("timeframe", 0)} years'),
-        ("Monthly Savings", f'₹{financial_plan.get("monthly_saving_amount", 0):,.2f}'),
-        ("Plan Details", financial_plan.get("financial_plan", ""))
-    ]
-
-    for label, value in fields:
-        text = f"{label}: {value}"
-        # Handle Unicode characters properly
-        pdf.multi_cell(0, 10, txt=text.encode('latin-1', 'replace').decode('latin-1'))
-        pdf.ln(5)
-
-    pdf_path = "financial_plan.pdf"
-    pdf.output(pdf_path)
-    return pdf_path
-
-
-# MongoDB Configuration
-MONGO_URI = "mongodb://localhost:27017"
-DB_NAME = "demodb"
-FINANCE_COLLECTION = "finance"
-PLANS_COLLECTION = "financial"
-
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-finance_col = db[FINANCE_COLLECTION]
-plans_col = db[PLANS_COLLECTION]
+    """The plan report as PDF bytes, for st.download_button"""
+    return get_pdf_renderer().render(financial_plan)
+
+
+def pdf_download_button(label):
+    """Download button for the plan report; if it cannot be rendered (e.g. the
+    font file is missing) an error is shown and the rest of the page goes on"""
+    try:
+        data = generate_pdf(st.session_state.plan_data)
+    except Exception as e:
+        st.error(f"Could not create the PDF report: {e}")
+        return
+    st.download_button(label, data=data, file_name="financial_plan.pdf", mime="application/pdf")
+
 
 # Initialize Gemini
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 model = genai.GenerativeModel('gemini-1.5-pro')
 
+
+@st.cache_resource
+def get_plan_generator():
+    # Identical profiles are answered from the plan cache instead of Gemini
+    return PlanGenerator(model)
+
+
+@st.cache_resource
+def get_plan_jobs():
+    return PlanJobQueue(get_plan_generator())
+
+
+def init_database():
+    # Indexes on name/created_at, created once per process. If MongoDB is
+    # down the page still loads, and a later run creates them once it is back
+    try:
+        mongo.ensure_indexes()
+    except PyMongoError as e:
+        st.warning(f"Database unavailable, your data may not be saved: {e}")
+
+
+init_database()
+
 # Chat UI CSS
 # Custom CSS
 st.markdown("""
@@ -198,6 +263,8 @@ if "step" not in st.session_state:
     st.session_state.step = 0
 if "plan_data" not in st.session_state:
     st.session_state.plan_data = {}
+if "session_id" not in st.session_state:
+    st.session_state.session_id = new_session_id()
 
 st.sidebar.markdown("### 🗓️ Progress Tracker")
 steps = ["Profile Setup", "Goal Entry", "Plan Generation", "Finalization"]
@@ -206,34 +273,26 @@ for i, step in enumerate(steps):
     st.sidebar.markdown(f"{'▶️' if i == current_step else '✔️'} {step}")
 def save_financial_data():
     try:
-        finance_col.update_one(
-            {"name": st.session_state.plan_data["name"]},
-            {"$set": {
-                "income": st.session_state.plan_data["income"],
-                "expenses": st.session_state.plan_data["expenses"],
-                "last_updated": datetime.now()
-            }},
-            upsert=True
+        mongo.save_finance(
+            st.session_state.plan_data["name"],
+            income=st.session_state.plan_data["income"],
+            expenses=st.session_state.plan_data["expenses"]
         )
     except Exception as e:
         st.error(f"Error saving financial data: {e}")
 
 
 def save_plan_data():
-    inflation_amount = st.session_state.plan_data["goal_amount"]*(1.03)**st.session_state.plan_data["timeframe"]
+    inflation_amount, _ = project(st.session_state.plan_data["goal_amount"], st.session_state.plan_data["timeframe"])
     try:
-        plans_col.update_one(
-            {"name": st.session_state.plan_data["name"]},
-            {"$set": {
-                "goal": st.session_state.plan_data["goal_description"],
-                "amount": st.session_state.plan_data["goal_amount"],
-                "timeframe": st.session_state.plan_data["timeframe"],
-                "inflation_amount":inflation_amount,
-                "monthly_saving": st.session_state.plan_data["monthly_saving_amount"],
-                "plan": st.session_state.plan_data["financial_plan"],
-                "created_at": datetime.now()
-            }},
-            upsert=True
+        mongo.save_plan(
+            st.session_state.plan_data["name"],
+            goal=st.session_state.plan_data["goal_description"],
+            amount=st.session_state.plan_data["goal_amount"],
+            timeframe=st.session_state.plan_data["timeframe"],
+            inflation_amount=inflation_amount,
+            monthly_saving=st.session_state.plan_data["monthly_saving_amount"],
+            plan=st.session_state.plan_data["financial_plan"]
         )
     except Exception as e:
         st.error(f"Error saving plan data: {e}")
@@ -241,37 +300,29 @@ def save_plan_data():
 
 def generate_financial_plan():
     # Calculate inflation-adjusted goal amount
-    inflation_rate = 0.03
-    current_goal = st.session_state.plan_data['goal_amount']
-    timeframe = st.session_state.plan_data['timeframe']
-    adjusted_goal = current_goal * (1 + inflation_rate) ** timeframe
+    adjusted_goal, _ = project(st.session_state.plan_data['goal_amount'], st.session_state.plan_data['timeframe'])
 
     # Store adjusted value
     st.session_state.plan_data['adjusted_goal_amount'] = adjusted_goal
 
-    prompt = f"""
-    Create a comprehensive financial plan considering 3% annual inflation for {st.session_state.plan_data['name']}:
-    - Current Monthly Income: ₹{st.session_state.plan_data['income']:,.2f}
-    - Monthly Expenses: ₹{st.session_state.plan_data['expenses']:,.2f}
-    - Financial Goal: {st.session_state.plan_data['goal_description']}
-    - Current Target Amount: ₹{current_goal:,.2f}
-    - Inflation-adjusted Target ({timeframe} years): ₹{adjusted_goal:,.2f}
-    - Timeframe: {timeframe} years
-
-    Include:
-    1. Inflation-adjusted savings strategy
-    2. Investment recommendations accounting for inflation
-    3. Expense optimization tips
-    4. Risk management strategies
-    5. Progress tracking considering inflation
-    6. Alternative scenarios
-    """
-
-    try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error generating plan: {str(e)}"
+    # Generation runs on the job queue. plan_job stays set until the result
+    # is used, so a rerun while it is in progress comes back here and the
+    # same inputs get the same job back instead of starting over
+    job_id = get_plan_jobs().submit(st.session_state.session_id, st.session_state.plan_data)
+    st.session_state.plan_job = job_id
+
+    # Show the plan in a bot bubble as it streams in
+    bubble = st.empty()
+    job = get_plan_jobs().wait(
+        job_id,
+        on_progress=lambda text: bubble.markdown(f'<div class="bot-bubble">🤖 {text}</div>',
+                                                 unsafe_allow_html=True)
+    )
+    st.session_state.plan_job = None
+    if job["status"] == FAILED:
+        bubble.empty()
+        return f"Error generating plan: {job['error']}"
+    return job["text"]
 
 
 
@@ -293,7 +344,7 @@ display_chat()
 if st.session_state.step == 0:
     name = st.text_input("Please enter your name to begin:", key="name_input")
     if name:
-        user_data = finance_col.find_one({"name": name})
+        user_data = mongo.find_finance(name)
         st.session_state.plan_data["name"] = name
 
         if user_data:
@@ -415,9 +466,13 @@ elif st.session_state.step == 6:
         key="timeframe_input"
     )
 
+    # A rerun during generation arrives without the button press; resume
+    # the plan job still in progress rather than showing the form again
+    resuming = bool(st.session_state.get("plan_job"))
+
     col1, col2 = st.columns([1, 3])
     with col1:
-        if st.button("Submit Timeframe"):
+        if st.button("Submit Timeframe") or resuming:
             if timeframe:
                 # Add validation checks
                 income = st.session_state.plan_data["income"]
@@ -431,8 +486,7 @@ elif st.session_state.step == 6:
                 st.session_state.plan_data["timeframe"] = timeframe
 
                 # Calculate inflation-adjusted monthly savings
-                adjusted_goal = st.session_state.plan_data["goal_amount"] * (1.03) ** timeframe
-                monthly_savings = adjusted_goal / (timeframe * 12)
+                adjusted_goal, monthly_savings = project(st.session_state.plan_data["goal_amount"], timeframe)
 
                 # Validation checks
                 warning = ""
@@ -467,18 +521,16 @@ elif st.session_state.step == 6:
                                    "Are you satisfied with this plan? (yes/no)"
                     })
 
+                    save_plan_data()
+                    st.session_state.step = 7
+
                     # Add PDF and TTS buttons
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("Read Aloud"):
                             text_to_speech(str(st.session_state.plan_data["financial_plan"]))
                     with col2:
-                        if st.button("Download PDF"):
-                            pdf_path = generate_pdf(st.session_state.plan_data)
-                            st.success(f"PDF generated! [Download here]({pdf_path})")
-
-                    save_plan_data()
-                    st.session_state.step = 7
+                        pdf_download_button("Download PDF")
                 st.rerun()
 
 
@@ -510,9 +562,7 @@ elif st.session_state.step == 7:
                 if st.button("🔊 Read Aloud"):
                     text_to_speech(str(plan))
         with col2:
-            if st.button("📥 Generate PDF"):
-                pdf_path = generate_pdf(st.session_state.plan_data)
-                st.success(f"PDF generated! Saved to {pdf_path}")
+            pdf_download_button("📥 Download PDF")
 
         with col3:
             if st.button("✅ Yes"):
@@ -546,6 +596,27 @@ elif st.session_state.step == 7:
     if st.session_state.plan_data.get("goal_amount", 0) < 1000:
         st.warning("❗ Small goal amount detected - verify your target")
 
+    if st.session_state.plan_data.get("goal_amount") and st.session_state.plan_data.get("timeframe"):
+        with st.expander("📊 Alternative scenarios"):
+            scenarios = scenario_grid(st.session_state.plan_data["goal_amount"],
+                                      st.session_state.plan_data["timeframe"])
+            st.dataframe(scenarios.style.format({
+                "Goal Amount": "₹{:,.0f}", "Adjusted Goal": "₹{:,.0f}", "Monthly Saving": "₹{:,.0f}",
+                "Inflation": "{:.0%}", "Return": "{:.0%}"
+            }), use_container_width=True)
+
+        with st.expander("🎲 Chance of reaching your goal"):
+            try:
+                outcome = simulate_plan(st.session_state.plan_data, seed=0)
+            except ValueError as e:
+                st.info(f"No simulation for this plan: {e}")
+            else:
+                st.metric("Probability of reaching the inflation-adjusted goal",
+                          f"{outcome['success_probability']:.0%}")
+                st.line_chart(pd.DataFrame({f"{p}th percentile": band for p, band in outcome["bands"].items()},
+                                           index=pd.Index(outcome["years"], name="Year")))
+                st.caption(f"Goal after inflation (median): ₹{outcome['median_goal']:,.0f}")
+
 elif st.session_state.step == 8:
     adjustment = st.text_input("Enter choice (1-3):", key="adjustment_choice")
     if adjustment in ["1", "2", "3"]:
@@ -578,6 +649,8 @@ elif st.session_state.step == 8:
 
 elif st.session_state.step == 9:
     new_value = st.text_input("Enter adjustment:", key="final_adjustment")
+    # The input keeps its value across reruns, so a rerun during generation
+    # comes back here and resumes the plan job in progress
     if new_value:
         try:
             if st.session_state.adjust_type == "timeframe":
@@ -595,11 +668,10 @@ elif st.session_state.step == 9:
                 try:
                     plan = generate_financial_plan()
                     st.session_state.plan_data["financial_plan"] = plan
-                    adjusted_goal = st.session_state.plan_data["goal_amount"] * (1.03) ** st.session_state.plan_data["timeframe"]
-                    monthly_savings = adjusted_goal / (
-                            st.session_state.plan_data["timeframe"] * 12
-                    )
+                    adjusted_goal, monthly_savings = project(st.session_state.plan_data["goal_amount"],
+                                                             st.session_state.plan_data["timeframe"])
                     st.session_state.plan_data["monthly_saving_amount"] = monthly_savings
+                    save_plan_data()
 
                     # Add buttons to main interface
                     col1, col2 = st.columns(2)
@@ -607,9 +679,7 @@ elif st.session_state.step == 9:
                         if st.button("Read Aloud 🔊"):
                             text_to_speech(str(st.session_state.plan_data["financial_plan"]))
                     with col2:
-                        if st.button("Download PDF 📥"):
-                            pdf_path = generate_pdf(st.session_state.plan_data)
-                            st.success(f"PDF saved to {pdf_path}")
+                        pdf_download_button("Download PDF 📥")
 
                     # Add profile tracker to sidebar
                     with st.sidebar:
@@ -625,11 +695,13 @@ elif st.session_state.step == 9:
                                    f"Required Monthly Savings: ₹{monthly_savings:,.2f}\n\n"
                                    "Are you satisfied with this plan? (yes/no)"
                     })
-                    save_plan_data()
                     st.session_state.step = 7
 
                 except Exception as e:
                     st.error(f"Error generating plan: {e}")
             st.rerun()
         except:
-            st.error("Invalid input format. Please try again.")
\ No newline at end of file
+            st.error("Invalid input format. Please try again.")
+
+# Read-aloud audio, last so the page is complete while it is synthesized
+render_speech()
@@ -1,37 +1,18 @@
-import os
 from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 import matplotlib.pyplot as plt
-from textblob import TextBlob
-from statsmodels.tsa.arima.model import ARIMA
 from datetime import datetime, timedelta
 import warnings
+from price_store import PriceStore
+from universe import stocks
+import forecast
+import news
+from sentiment import SentimentScorer
 
 warnings.filterwarnings("ignore")
 
-# News API configuration
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")  # Get from https://newsapi.org/
-NEWS_API_URL = "https://newsapi.org/v2/everything"
-
-stocks = [
-    "ASIANPAINT.BO", "AXISBANK.BO", "BAJFINANCE.BO",
-    "GOOGL", "AMZN", "TSLA", "META", "NVDA", "NFLX",
-    "BRK-B", "JPM", "JNJ", "WMT", "PG", "V", "XOM",
-    "RELIANCE.BO", "TCS.BO", "INFY.BO", "HDFCBANK.BO", "ICICIBANK.BO",
-    "KOTAKBANK.BO", "LT.BO", "ITC.BO", "SBIN.BO", "BHARTIARTL.BO",
-    "HCLTECH.BO", "WIPRO.BO", "TITAN.BO", "ULTRACEMCO.BO", "MARUTI.BO",
-    "TATAMOTORS.BO", "M&M.BO", "BAJAJFINSV.BO", "SUNPHARMA.BO", "DRREDDY.BO",
-    "ONGC.BO", "POWERGRID.BO", "NTPC.BO", "ADANIENT.BO", "ADANIGREEN.BO",
-    "CIPLA.BO", "DABUR.BO", "BPCL.BO", "HINDALCO.BO", "GRASIM.BO"
-]
-
-
-
 # Custom CSS styling
 st.markdown("""
 <style>
@@ -56,65 +37,79 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_price_store():
+    # Shared across reruns and sessions. The whole universe is warmed in the
+    # background so picking any ticker in the selectbox is served from memory.
+    store = PriceStore()
+    store.start_refresher(stocks)
+    return store
+
+
 def get_stock_data(ticker, period="2y"):
     try:
-        return yf.Ticker(ticker).history(period=period)
+        return get_price_store().get(ticker, period=period)
     except Exception as e:
         st.error(f"Data fetch error: {str(e)}")
         return pd.DataFrame()
 
 
-def predict_arima(df, days=7):
+@st.cache_resource
+def get_forecast_cache():
+    return forecast.ForecastCache()
+
+
+@st.cache_data(ttl=3600)
+def get_forecast_table():
+    # Written nightly by `python forecast.py`
+    return forecast.read_forecast_table()
+
+
+def predict_arima(df, days=7, ticker=None):
     try:
-        model = ARIMA(df['Close'], order=(5, 1, 0))
-        model_fit = model.fit()
-        forecast = model_fit.get_forecast(steps=days)
-        return forecast.predicted_mean
+        if ticker is not None:
+            precomputed = forecast.lookup_forecast(get_forecast_table(), ticker, df.index[-1], days)
+            if precomputed is not None:
+                return precomputed
+        if forecast.FORECAST_BACKEND != forecast.StatsmodelsForecaster.name:
+            return forecast.get_forecaster().forecast(df['Close'], days)
+        return forecast.predict_arima(df['Close'], days=days, ticker=ticker,
+                                      cache=get_forecast_cache())
     except Exception as e:
         st.error(f"ARIMA Error: {str(e)}")
         return pd.Series()
 
 
+@st.cache_resource
+def get_news_fetcher():
+    # One pooled HTTP session for every session and rerun
+    return news.NewsFetcher()
+
+
 def get_news(ticker):
     try:
-        params = {
-            'q': ticker,
-            'apiKey': NEWS_API_KEY,
-            'language': 'en',
-            'sortBy': 'relevancy',
-            'pageSize': 5
-        }
-
-        response = requests.get(NEWS_API_URL, params=params)
-        if response.status_code == 200:
-            return response.json().get('articles', [])
-        else:
-            st.error(f"News API Error: {response.status_code} - {response.text}")
-            return []
+        return get_news_fetcher().get_news(ticker)
     except Exception as e:
         st.error(f"News Error: {str(e)}")
         return []
 
 
-def scrape_article(url):
+def scrape_articles(urls):
+    """Scraped text per url, fetched concurrently. Failed pages come back as exceptions"""
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return get_news_fetcher().scrape_articles(urls)
+    except Exception as e:
+        return [e] * len(urls)
 
-        # Try to find article text using common tags
-        article_text = ""
-        for paragraph in soup.find_all(['p', 'article', 'div.main-content']):
-            article_text += paragraph.get_text() + "\n"
 
-        return article_text[:5000]  # Return first 5000 characters
-    except Exception as e:
-        st.error(f"Scraping Error: {str(e)}")
-        return ""
+@st.cache_resource
+def get_sentiment_scorer():
+    return SentimentScorer()
 
 
-def analyze_sentiment(text):
-    analysis = TextBlob(text)
-    return analysis.sentiment.polarity  # Returns between -1 (negative) to 1 (positive)
+def analyze_sentiments(texts):
+    # Returns between -1 (negative) to 1 (positive) for each text, memoised by content
+    return get_sentiment_scorer().score_many(texts)
 
 
 # Streamlit UI
@@ -130,7 +125,7 @@ if st.button("Analyze"):
 
         if not data.empty:
             # Price Prediction
-            arima_pred = predict_arima(data)
+            arima_pred = predict_arima(data, ticker=selected_stock)
             if not arima_pred.empty:
                 st.subheader("Price Forecast (Next 7 Days)")
                 fig, ax = plt.subplots(figsize=(10, 4))
@@ -143,9 +138,26 @@ if st.button("Analyze"):
 
         # News Analysis
         st.subheader("Latest News")
-        articles = get_news(selected_stock)
+        articles = get_news(selected_stock)[:3]  # Show top 3 articles
+
+        # Scrape the news pages and the custom article in one concurrent batch
+        urls = [article['url'] for article in articles] + ([custom_article] if custom_article else [])
+        scraped = scrape_articles(urls)
+
+        # NewsAPI truncates 'content', prefer the scraped page when we got it
+        texts = [text if isinstance(text, str) and text else article.get('content') or ""
+                 for article, text in zip(articles, scraped)]
+        custom_text = ""
+        if custom_article:
+            if isinstance(scraped[-1], Exception):
+                st.error(f"Scraping Error: {str(scraped[-1])}")
+            else:
+                custom_text = scraped[-1]
+
+        # Score every article in one batch
+        sentiments = analyze_sentiments(texts + [custom_text])
 
-        for article in articles[:3]:  # Show top 3 articles
+        for article, article_text, sentiment in zip(articles, texts, sentiments):
             with st.container():
                 st.markdown(f"""
                 <div class="news-card">
@@ -156,8 +168,7 @@ if st.button("Analyze"):
                 """, unsafe_allow_html=True)
 
                 # Analyze article sentiment
-                if article.get('content'):
-                    sentiment = analyze_sentiment(article['content'])
+                if article_text:
                     sentiment_text = "Positive" if sentiment > 0 else "Negative" if sentiment < 0 else "Neutral"
                     st.markdown(f"**Sentiment:** <span class='sentiment-{'positive' if sentiment > 0 else 'negative'}'>\
                     {sentiment_text} ({sentiment:.2f})</span>", unsafe_allow_html=True)
@@ -165,10 +176,10 @@ if st.button("Analyze"):
         # Custom Article Analysis
         if custom_article:
             st.subheader("Custom Article Analysis")
-            article_text = scrape_article(custom_article)
+            article_text = custom_text
 
             if article_text:
-                sentiment = analyze_sentiment(article_text)
+                sentiment = sentiments[-1]
                 sentiment_text = "Positive" if sentiment > 0 else "Negative" if sentiment < 0 else "Neutral"
 
                 col1, col2 = st.columns([3, 1])
@@ -0,0 +1,327 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from price_store import PRICE_CACHE_DIR, read_frame, write_frame
+
+ARIMA_ORDER = (5, 1, 0)
+
+# Fitted models kept in memory (one entry per ticker, last bar and order)
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "128"))
+
+# Up to this many new bars reuse the previous parameters as they are,
+# beyond that we refit, starting the optimiser from the previous parameters
+REFIT_AFTER_BARS = int(os.getenv("FORECAST_REFIT_AFTER_BARS", "5"))
+
+# "statsmodels" (exact ARIMA likelihood) or "numpy" (least-squares AR on differences)
+FORECAST_BACKEND = os.getenv("FORECAST_BACKEND", "statsmodels")
+
+# Precomputed forecasts for the whole universe, written by the nightly batch
+FORECAST_TABLE = os.getenv("FORECAST_TABLE", os.path.join(PRICE_CACHE_DIR, "forecasts"))
+
+
+class ForecastCache:
+    """Bounded LRU of fitted ARIMA parameters and their forecasts"""
+
+    def __init__(self, maxsize=FORECAST_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def latest(self, ticker, order):
+        """Most recent entry for a ticker, whatever its last bar was"""
+        with self._lock:
+            key = self._latest.get((ticker, order))
+            return None if key is None else self._entries.get(key)
+
+    def put(self, key, entry):
+        ticker, _, order = key
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._latest[(ticker, order)] = key
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                old_ticker, _, old_order = old_key
+                if self._latest.get((old_ticker, old_order)) == old_key:
+                    del self._latest[(old_ticker, old_order)]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _needs_refit(closes, previous):
+    # Bars are counted from the last real fit, not the last filter pass, so
+    # bars arriving one a day still add up to a refit
+    if previous is None:
+        return True
+    return int((closes.index > previous["fitted_at"]).sum()) > REFIT_AFTER_BARS
+
+
+def fit_arima(closes, order=ARIMA_ORDER, previous=None):
+    """Fit ARIMA on a close series, reusing a previous fit where possible.
+
+    `previous` is an earlier cache entry for the same ticker and order. If only
+    a few bars arrived since its parameters were estimated, they are applied
+    to the new data with a single Kalman filter pass instead of running the
+    optimiser again.
+    """
+    model = ARIMA(closes, order=order)
+    if previous is None:
+        return model.fit()
+    if not _needs_refit(closes, previous):
+        return model.filter(previous["params"])
+    return model.fit(start_params=previous["params"])
+
+
+def predict_arima(closes, days=7, order=ARIMA_ORDER, ticker=None, cache=None):
+    """Forecast the next `days` closes, served from `cache` when possible"""
+    if ticker is None or cache is None:
+        return fit_arima(closes, order).get_forecast(steps=days).predicted_mean
+
+    key = (ticker, closes.index[-1], order)
+    entry = cache.get(key)
+    if entry is None:
+        previous = cache.latest(ticker, order)
+        fitted_at = closes.index[-1] if _needs_refit(closes, previous) else previous["fitted_at"]
+        model_fit = fit_arima(closes, order, previous)
+        entry = {"last_bar": closes.index[-1], "fitted_at": fitted_at, "params": model_fit.params,
+                 "model_fit": model_fit, "forecasts": {}}
+        cache.put(key, entry)
+
+    forecast = entry["forecasts"].get(days)
+    if forecast is None:
+        forecast = entry["model_fit"].get_forecast(steps=days).predicted_mean
+        entry["forecasts"][days] = forecast
+    return forecast
+
+
+
+class StatsmodelsForecaster:
+    """Exact ARIMA fits with statsmodels, one series at a time"""
+
+    name = "statsmodels"
+
+    def __init__(self, order=ARIMA_ORDER):
+        self.order = order
+
+    def forecast(self, closes, days=7):
+        predicted = fit_arima(closes, self.order).get_forecast(steps=days).predicted_mean
+        return pd.Series(np.asarray(predicted))
+
+    def forecast_many(self, closes_by_ticker, days=7):
+        return {ticker: self.forecast(closes, days) for ticker, closes in closes_by_ticker.items()}
+
+
+class NumpyARForecaster:
+    """ARIMA(p, 1, 0) as an AR(p) on differenced closes, fitted by least squares.
+
+    Series of equal length are stacked into one matrix and every ticker in
+    the stack is solved in a single batched call, which is what makes this
+    orders of magnitude faster than statsmodels. Estimates are conditional
+    least squares rather than exact maximum likelihood, so forecasts agree
+    with statsmodels to within a small tolerance, not bit for bit.
+    """
+
+    name = "numpy"
+
+    def __init__(self, order=ARIMA_ORDER):
+        p, d, q = order
+        if d != 1 or q != 0:
+            raise ValueError(f"NumpyARForecaster only supports (p, 1, 0) orders, got {order}")
+        self.order = order
+        self.p = p
+
+    def fit(self, closes):
+        """AR coefficients for a (tickers, bars) matrix of closes, lag 1 first"""
+        p = self.p
+        diffs = np.diff(closes, axis=1)
+        n_obs = diffs.shape[1] - p
+        # lags[:, t, k] is the difference k + 1 bars before target t
+        lags = np.stack([diffs[:, p - k - 1:p - k - 1 + n_obs] for k in range(p)], axis=2)
+        targets = diffs[:, p:]
+        xtx = np.einsum("ntk,ntj->nkj", lags, lags)
+        xty = np.einsum("ntk,nt->nk", lags, targets)
+        return np.linalg.solve(xtx, xty[..., None])[..., 0]
+
+    def forecast_matrix(self, closes, days=7):
+        closes = np.asarray(closes, dtype=float)
+        phi = self.fit(closes)
+        recent = np.diff(closes[:, -self.p - 1:], axis=1)[:, ::-1]  # lag 1 first
+        steps = np.empty((closes.shape[0], days))
+        for step in range(days):
+            steps[:, step] = np.einsum("nk,nk->n", phi, recent)
+            recent = np.concatenate([steps[:, step:step + 1], recent[:, :-1]], axis=1)
+        return closes[:, -1:] + np.cumsum(steps, axis=1)
+
+    def forecast(self, closes, days=7):
+        return pd.Series(self.forecast_matrix(np.asarray(closes)[None, :], days)[0])
+
+    def forecast_many(self, closes_by_ticker, days=7):
+        # Tickers listed on different exchanges have different bar counts,
+        # each group of equal length is fitted as one stack
+        by_length = {}
+        for ticker, closes in closes_by_ticker.items():
+            by_length.setdefault(len(closes), []).append(ticker)
+        forecasts = {}
+        for tickers in by_length.values():
+            matrix = np.vstack([np.asarray(closes_by_ticker[t], dtype=float) for t in tickers])
+            for ticker, row in zip(tickers, self.forecast_matrix(matrix, days)):
+                forecasts[ticker] = pd.Series(row)
+        return forecasts
+
+
+FORECASTERS = {
+    StatsmodelsForecaster.name: StatsmodelsForecaster,
+    NumpyARForecaster.name: NumpyARForecaster,
+}
+
+
+def get_forecaster(name=FORECAST_BACKEND, order=ARIMA_ORDER):
+    if name not in FORECASTERS:
+        raise ValueError(f"Unknown forecast backend: {name}")
+    return FORECASTERS[name](order)
+
+
+def compare_backends(closes_by_ticker, days=7, order=ARIMA_ORDER):
+    """Largest relative gap between the numpy and statsmodels forecasts per ticker"""
+    exact = StatsmodelsForecaster(order).forecast_many(closes_by_ticker, days)
+    fast = NumpyARForecaster(order).forecast_many(closes_by_ticker, days)
+    return {ticker: float(np.max(np.abs(fast[ticker] - exact[ticker]) / np.abs(exact[ticker])))
+            for ticker in exact}
+
+def _forecast_one(job):
+    # Runs in a worker process, errors are returned rather than raised so one
+    # bad ticker doesn't take the whole batch down
+    ticker, closes, days, order = job
+    try:
+        predicted = fit_arima(closes, order).get_forecast(steps=days).predicted_mean
+        return ticker, closes.index[-1].strftime("%Y-%m-%d"), list(predicted), None
+    except Exception as e:
+        return ticker, None, None, str(e)
+
+
+def _forecast_numpy(closes_by_ticker, days, order):
+    try:
+        forecasts = NumpyARForecaster(order).forecast_many(closes_by_ticker, days)
+    except np.linalg.LinAlgError:
+        # A degenerate series makes the whole stack singular, fall back to one by one
+        return [_forecast_one((ticker, closes, days, order))
+                for ticker, closes in closes_by_ticker.items()]
+    return [(ticker, closes_by_ticker[ticker].index[-1].strftime("%Y-%m-%d"), list(predicted), None)
+            for ticker, predicted in forecasts.items()]
+
+
+def forecast_universe(closes_by_ticker, days=7, order=ARIMA_ORDER, max_workers=None,
+                      backend=FORECAST_BACKEND):
+    """Forecast every ticker, one ARIMA fit per process with the statsmodels
+    backend or a single batched solve with the numpy one.
+
+    Returns the forecast table (one row per ticker and step) and a dict of
+    tickers that failed with their error message.
+    """
+    closes_by_ticker = {ticker: closes.dropna() for ticker, closes in closes_by_ticker.items()
+                        if len(closes.dropna())}
+    if backend == NumpyARForecaster.name:
+        results = _forecast_numpy(closes_by_ticker, days, order)
+    else:
+        jobs = [(ticker, closes, days, order) for ticker, closes in closes_by_ticker.items()]
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(max_workers, max(len(jobs), 1))) as pool:
+            results = list(pool.map(_forecast_one, jobs))
+
+    rows, errors = [], {}
+    for ticker, last_bar, predicted, error in results:
+        if error:
+            errors[ticker] = error
+            continue
+        for step, value in enumerate(predicted, start=1):
+            rows.append({"ticker": ticker, "last_bar": last_bar, "order": str(order),
+                         "step": step, "forecast": value})
+    table = pd.DataFrame(rows, columns=["ticker", "last_bar", "order", "step", "forecast"])
+    return table, errors
+
+
+def write_forecast_table(table, path=FORECAST_TABLE):
+    write_frame(table, path)
+
+
+def read_forecast_table(path=FORECAST_TABLE):
+    table = read_frame(path)
+    return pd.DataFrame() if table is None else table
+
+
+def lookup_forecast(table, ticker, last_bar, days=7, order=ARIMA_ORDER):
+    """Precomputed forecast for a ticker if the table was built from the same last bar"""
+    if table.empty:
+        return None
+    rows = table[(table["ticker"] == ticker)
+                 & (table["last_bar"] == last_bar.strftime("%Y-%m-%d"))
+                 & (table["order"] == str(order))]
+    if len(rows) < days:
+        return None
+    return rows.sort_values("step")["forecast"].iloc[:days].reset_index(drop=True)
+
+
+def benchmark(n_tickers=46, n_bars=500, days=7, seed=0):
+    """Fits per second of each backend on synthetic random-walk closes"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2023-01-02", periods=n_bars)
+    closes = {f"T{i}": pd.Series(100 + np.cumsum(rng.normal(size=n_bars)), index=index)
+              for i in range(n_tickers)}
+    for name, forecaster_cls in FORECASTERS.items():
+        forecaster = forecaster_cls()
+        started = time.perf_counter()
+        forecaster.forecast_many(closes, days)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>12}: {n_tickers / elapsed:10.1f} fits/s")
+    gaps = compare_backends(closes, days)
+    print(f"max relative forecast gap: {max(gaps.values()):.2e}")
+
+
+if __name__ == "__main__":
+    # Nightly job: python forecast.py [--days 7] [--workers N] [--backend numpy]
+    # Backend benchmark: python forecast.py --bench
+    import argparse
+    import warnings
+    from price_store import PriceStore
+    from universe import stocks
+
+    warnings.filterwarnings("ignore")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--backend", default=FORECAST_BACKEND, choices=sorted(FORECASTERS))
+    parser.add_argument("--output", default=FORECAST_TABLE)
+    parser.add_argument("--bench", action="store_true", help="compare backend throughput and exit")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(days=args.days)
+        raise SystemExit
+
+    store = PriceStore()
+    store.warm(stocks)
+    frames = {ticker: store.get(ticker) for ticker in stocks}
+    closes = {ticker: df["Close"] for ticker, df in frames.items() if not df.empty}
+
+    started = time.perf_counter()
+    table, errors = forecast_universe(closes, days=args.days, max_workers=args.workers,
+                                      backend=args.backend)
+    write_forecast_table(table, args.output)
+    elapsed = time.perf_counter() - started
+    print(f"Forecast {len(closes) - len(errors)} tickers in {elapsed:.1f}s -> {args.output}")
+    for ticker, error in errors.items():
+        print(f"  {ticker}: {error}")
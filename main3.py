@@ -1,14 +1,15 @@
 import streamlit as st
 import google.generativeai as genai
-from pymongo import MongoClient
+import mongo
+from pymongo.errors import PyMongoError
+from projection import project
 
-# Initialize MongoDB connection
-MONGO_URI = ""  # Update with your actual MongoDB URI
-db_name = ""
-collection_name = ""
-client = MongoClient(MONGO_URI)
-db = client[db_name]
-collection = db[collection_name]
+# Same database and indexes as chatbot2 (configure it with MONGO_URI); the
+# page still loads without MongoDB and a later run creates them
+try:
+    mongo.ensure_indexes()
+except PyMongoError as e:
+    st.warning(f"Database unavailable, plans may not be saved: {e}")
 
 # Initialize Gemini
 genai.configure(api_key="")# Create Your API key using google ai studios link : - https://aistudio.google.com/app/apikey
@@ -18,7 +19,10 @@ model = genai.GenerativeModel('gemini-pro')
 # Function to save financial plan to MongoDB
 def save_to_mongodb(data):
     try:
-        collection.insert_one(data)
+        # Same profile and plan documents as chatbot2, each plan kept as a version
+        mongo.save_finance(data["name"], data["income"], data["expenses"])
+        mongo.save_plan(data["name"], data["goal_description"], data["goal_amount"], data["timeframe"],
+                        data["inflation_amount"], data["monthly_saving_amount"], data["financial_plan"])
         st.success("Financial plan saved successfully! ✅")
     except Exception as e:
         st.error(f"Error saving to MongoDB: {e} ❌")
@@ -53,7 +57,7 @@ if st.button("Generate Financial Plan 🚀"):
             try:
                 response = model.generate_content(prompt)
                 plan = response.text
-                monthly_savings_needed = goal_amount / (timeframe * 12)
+                inflation_amount, monthly_savings_needed = project(goal_amount, timeframe)
 
                 # Save data to MongoDB
                 data = {
@@ -63,6 +67,7 @@ if st.button("Generate Financial Plan 🚀"):
                     "goal_description": goal_description,
                     "goal_amount": goal_amount,
                     "timeframe": timeframe,
+                    "inflation_amount": inflation_amount,
                     "monthly_saving_amount": monthly_savings_needed,
                     "financial_plan": plan
                 }
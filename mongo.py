@@ -0,0 +1,319 @@
+import os
+import time
+import zlib
+import logging
+import threading
+from datetime import datetime
+from bson import Binary
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+from write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+# MongoDB Configuration
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGO_DB", "demodb")
+FINANCE_COLLECTION = "finance"
+PLANS_COLLECTION = "financial"
+PLAN_VERSIONS_COLLECTION = "plan_versions"
+
+# Connection pool and timeouts (milliseconds)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+# Write concern: a number of nodes or "majority"
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN", "1")
+# Buffer profile and plan upserts and write them in bulk off the request path
+MONGO_WRITE_BEHIND = os.getenv("MONGO_WRITE_BEHIND", "0") == "1"
+# After ensure_indexes fails to reach the server, calls within this many
+# seconds fail at once instead of waiting out the server selection timeout
+MONGO_INDEX_RETRY_SECONDS = float(os.getenv("MONGO_INDEX_RETRY_SECONDS", "30"))
+
+_client = None
+_client_lock = threading.Lock()
+_write_buffer = None
+_indexed = set()
+_index_failures = {}
+
+# (collection, keys, options) created by ensure_indexes
+INDEXES = [
+    (FINANCE_COLLECTION, [("name", ASCENDING)], {"unique": True}),
+    (PLANS_COLLECTION, [("name", ASCENDING)], {"unique": True}),
+    (PLANS_COLLECTION, [("created_at", DESCENDING)], {}),
+    (PLAN_VERSIONS_COLLECTION, [("name", ASCENDING), ("version", DESCENDING)], {"unique": True}),
+]
+# Fields the step-0 lookup actually uses
+FINANCE_PROJECTION = {"_id": 0, "name": 1, "income": 1, "expenses": 1}
+
+
+def _write_concern():
+    return int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN
+
+
+def get_client():
+    """The process-wide MongoClient, created on first use.
+
+    The module is imported once per process, so Streamlit reruns and
+    concurrent sessions all share this client and its connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    serverSelectionTimeoutMS=MONGO_SERVER_TIMEOUT_MS,
+                    connectTimeoutMS=MONGO_SERVER_TIMEOUT_MS,
+                    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                    w=_write_concern(),
+                )
+    return _client
+
+
+def set_client(client):
+    """Use another client, e.g. mongomock.MongoClient() in tests"""
+    global _client
+    with _client_lock:
+        _client = client
+        _indexed.clear()
+        _index_failures.clear()
+
+
+def ensure_indexes(db_name=DB_NAME):
+    """Create the indexes the lookups and upserts rely on, once per process.
+
+    create_index is a no-op for an index that already exists. A unique index
+    that cannot be built because of existing duplicate names falls back to
+    a plain one, so lookups stay indexed until the data is cleaned up.
+
+    Raises PyMongoError when the server cannot be reached. Only a successful
+    run is remembered, so a later call tries again, at most once every
+    MONGO_INDEX_RETRY_SECONDS.
+    """
+    if db_name in _indexed:
+        return
+    failure = _index_failures.get(db_name)
+    if failure is not None and time.monotonic() - failure[0] < MONGO_INDEX_RETRY_SECONDS:
+        raise failure[1]
+    db = get_client()[db_name]
+    try:
+        for name, keys, options in INDEXES:
+            try:
+                db[name].create_index(keys, **options)
+            except OperationFailure as e:
+                if not options.get("unique"):
+                    raise
+                logger.warning("Unique index on %s.%s not created (%s); using a non-unique one",
+                               name, keys[0][0], e)
+                db[name].create_index(keys)
+    except PyMongoError as e:
+        _index_failures[db_name] = (time.monotonic(), e)
+        raise
+    _index_failures.pop(db_name, None)
+    _indexed.add(db_name)
+
+
+def get_write_buffer():
+    """The shared write-behind buffer, or None when MONGO_WRITE_BEHIND is off"""
+    global _write_buffer
+    if not MONGO_WRITE_BEHIND:
+        return None
+    if _write_buffer is None:
+        with _client_lock:
+            if _write_buffer is None:
+                _write_buffer = WriteBehindBuffer()
+    return _write_buffer
+
+
+def _upsert(collection, filter, fields):
+    buffer = get_write_buffer()
+    if buffer is not None:
+        buffer.upsert(collection, filter, fields)
+    else:
+        collection.update_one(filter, {"$set": fields}, upsert=True)
+
+
+def get_collection(name, db_name=DB_NAME):
+    return get_client()[db_name][name]
+
+
+def finance_collection():
+    return get_collection(FINANCE_COLLECTION)
+
+
+def plans_collection():
+    return get_collection(PLANS_COLLECTION)
+
+
+def plan_versions_collection():
+    return get_collection(PLAN_VERSIONS_COLLECTION)
+
+
+# Finance profiles: {name: str, income: float, expenses: float, last_updated: datetime}
+
+def find_finance(name):
+    """Stored income and expenses for `name`, or None"""
+    collection = finance_collection()
+    user_data = collection.find_one({"name": name}, FINANCE_PROJECTION)
+    buffer = get_write_buffer()
+    pending = buffer.pending_fields(collection, {"name": name}) if buffer else {}
+    if pending:
+        user_data = {**(user_data or {"name": name}), **pending}
+    return user_data
+
+
+def save_finance(name, income, expenses):
+    _upsert(finance_collection(), {"name": name}, {
+        "income": income,
+        "expenses": expenses,
+        "last_updated": datetime.now()
+    })
+
+
+# Plans are append-only. Every save adds a document to plan_versions:
+#   {name: str, version: int, plan_z: zlib-compressed plan text, created_at: datetime, **fields}
+# and moves the latest pointer in `financial` (one document per name) to it:
+#   {name: str, version: int, latest_version: int, plan: str, created_at: datetime, **fields}
+# `version` is the counter new versions are allocated from, `latest_version`
+# the one the pointer currently describes.
+
+PLAN_META_PROJECTION = {"_id": 0, "plan_z": 0}
+
+
+def _compress(text):
+    return Binary(zlib.compress(text.encode("utf-8"), 6))
+
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _archive_legacy_plan(pointer_col, versions_col, name):
+    # Pointers saved before plans were versioned hold a plan but no version
+    # counter. Claim one atomically as version 1 and keep its plan in the
+    # history before a new version replaces it.
+    legacy = pointer_col.find_one_and_update(
+        {"name": name, "plan": {"$exists": True}, "version": {"$exists": False}},
+        {"$set": {"version": 1, "latest_version": 1}})
+    if legacy is None:
+        return
+    fields = {k: v for k, v in legacy.items() if k not in ("_id", "name", "plan", "created_at")}
+    versions_col.insert_one({**fields, "name": name, "version": 1, "plan_z": _compress(legacy["plan"]),
+                             "created_at": legacy.get("created_at", datetime.now())})
+
+
+def save_plan_version(pointer_col, versions_col, name, fields, plan):
+    """Append a plan version for `name` and point the latest plan at it.
+
+    Returns the new version number. Concurrent saves each get their own
+    number, and the pointer never moves back to an older version. The
+    pointer's plan fields are replaced by `fields`, not merged with them;
+    a plan saved before versioning is first kept as version 1.
+    """
+    created_at = datetime.now()
+    _archive_legacy_plan(pointer_col, versions_col, name)
+    counter = pointer_col.find_one_and_update(
+        {"name": name}, {"$inc": {"version": 1}},
+        projection={"version": 1}, upsert=True, return_document=ReturnDocument.AFTER)
+    version = counter["version"]
+
+    versions_col.insert_one({**fields, "name": name, "version": version,
+                             "plan_z": _compress(plan), "created_at": created_at})
+
+    # Replace rather than merge, so fields of an older plan never linger next
+    # to this one's. The filter pins the counter read just before; if another
+    # save moved it in between, the replace misses and is retried.
+    while True:
+        pointer = pointer_col.find_one({"name": name}, {"version": 1, "latest_version": 1})
+        if pointer.get("latest_version", 0) >= version:
+            break
+        result = pointer_col.replace_one(
+            {"_id": pointer["_id"], "version": pointer["version"],
+             "latest_version": pointer.get("latest_version")},
+            {**fields, "name": name, "version": pointer["version"], "latest_version": version,
+             "plan": plan, "created_at": created_at})
+        if result.matched_count:
+            break
+    return version
+
+
+def save_plan(name, goal, amount, timeframe, inflation_amount, monthly_saving, plan):
+    return save_plan_version(plans_collection(), plan_versions_collection(), name, {
+        "goal": goal,
+        "amount": amount,
+        "timeframe": timeframe,
+        "inflation_amount": inflation_amount,
+        "monthly_saving": monthly_saving,
+    }, plan)
+
+
+def current_plan(name):
+    """The latest plan for `name` with its inputs, from one indexed read"""
+    return plans_collection().find_one({"name": name}, {"_id": 0, "version": 0})
+
+
+def plan_history(name, limit=20, before=None):
+    """Version metadata for `name`, newest first, without the plan text.
+
+    Pages by version number: pass the last version of one page as `before`
+    to get the next, which stays an index range scan however deep it goes.
+    """
+    query = {"name": name}
+    if before is not None:
+        query["version"] = {"$lt": before}
+    cursor = plan_versions_collection().find(query, PLAN_META_PROJECTION)
+    return list(cursor.sort("version", DESCENDING).limit(limit))
+
+
+def get_plan_version(name, version):
+    """One stored version with its plan text decompressed, or None"""
+    doc = plan_versions_collection().find_one({"name": name, "version": version}, {"_id": 0})
+    if doc is None:
+        return None
+    doc["plan"] = _decompress(doc.pop("plan_z"))
+    return doc
+
+if __name__ == "__main__":
+    # Seed profile documents into a scratch database and time name lookups
+    # with and without the index, e.g. python mongo.py --docs 1000000
+    import time
+    import random
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--db", default="finance_bench")
+    args = parser.parse_args()
+
+    collection = get_collection(FINANCE_COLLECTION, args.db)
+    collection.drop()
+    started = time.perf_counter()
+    for start in range(0, args.docs, 10_000):
+        collection.insert_many([
+            {"name": f"user{i}", "income": 50_000.0 + i % 1000, "expenses": 20_000.0,
+             "last_updated": datetime.now(), "notes": "x" * 200}
+            for i in range(start, min(start + 10_000, args.docs))
+        ], ordered=False)
+    print(f"seeded {args.docs} documents in {time.perf_counter() - started:.1f}s")
+
+    def measure(label, lookups, projection=None):
+        names = [f"user{random.randrange(args.docs)}" for _ in range(lookups)]
+        latencies = []
+        for name in names:
+            started = time.perf_counter()
+            collection.find_one({"name": name}, projection)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+        print(f"{label:28} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+
+    measure("no index, full document", max(args.lookups // 100, 5))
+    ensure_indexes(args.db)
+    measure("indexed, full document", args.lookups)
+    measure("indexed, projected", args.lookups, FINANCE_PROJECTION)
+    collection.drop()
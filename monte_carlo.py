@@ -0,0 +1,125 @@
+import os
+import numpy as np
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from projection import INFLATION_RATE, project
+
+# Market assumptions for savings: mean annual return and its volatility
+MC_MEAN_RETURN = float(os.getenv("MC_MEAN_RETURN", "0.08"))
+MC_VOLATILITY = float(os.getenv("MC_VOLATILITY", "0.15"))
+# Annual inflation varies around INFLATION_RATE with this volatility
+MC_INFLATION_VOLATILITY = float(os.getenv("MC_INFLATION_VOLATILITY", "0.01"))
+MC_PATHS = int(os.getenv("MC_PATHS", "10000"))
+# Above this many paths the simulation is split over a process pool
+MC_CHUNK_PATHS = int(os.getenv("MC_CHUNK_PATHS", "50000"))
+MC_WORKERS = int(os.getenv("MC_WORKERS", str(os.cpu_count() or 1)))
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# Standard normal quantiles at 65536 evenly spaced probabilities. Indexing
+# this with random 16-bit integers draws normals several times faster than
+# the ziggurat sampler, and at 16 bits the discretisation is far below the
+# Monte Carlo noise (tails are cut at about 4.3 sigma).
+_NORMAL_TABLE = np.array([NormalDist().inv_cdf((i + 0.5) / 65536) for i in range(65536)])
+
+
+def _simulate_chunk(seed, paths, years, monthly_saving, goal_amount, initial,
+                    mean_return, volatility, inflation, inflation_volatility):
+    """Corpus at the end of every year and the inflated goal, for `paths` paths.
+
+    Each month's growth factor is drawn for every path at once. Within a
+    year the twelve factors fold into the year's growth A and the value B
+    that one rupee saved at the end of each month reaches by year end
+    (Horner's rule), so corpus[y] = corpus[y-1] * A + saving * B and the
+    only loop left is over years.
+    """
+    rng = np.random.default_rng(seed)
+    sigma = volatility / np.sqrt(12)
+    mu = np.log1p(mean_return) / 12 - sigma ** 2 / 2
+    factors = np.exp(mu + sigma * _NORMAL_TABLE).astype(np.float32)
+
+    draws = rng.integers(0, 65536, size=(12, years, paths), dtype=np.uint16)
+    year_growth = np.ones((years, paths), dtype=np.float32)
+    year_saving = np.zeros((years, paths), dtype=np.float32)
+    for month in draws:
+        growth = factors[month]
+        year_growth *= growth
+        year_saving *= growth
+        year_saving += 1
+
+    corpus = np.empty((years, paths), dtype=np.float64)
+    balance = np.full(paths, float(initial))
+    for year in range(years):
+        balance = balance * year_growth[year] + monthly_saving * year_saving[year]
+        corpus[year] = balance
+
+    yearly_inflation = inflation + inflation_volatility * rng.standard_normal((years, paths))
+    goal = goal_amount * np.prod(1 + yearly_inflation, axis=0)
+    return corpus.T, goal
+
+
+def simulate(goal_amount, timeframe, monthly_saving, initial=0.0, paths=MC_PATHS,
+             mean_return=MC_MEAN_RETURN, volatility=MC_VOLATILITY, inflation=INFLATION_RATE,
+             inflation_volatility=MC_INFLATION_VOLATILITY, seed=None, workers=MC_WORKERS,
+             chunk_paths=MC_CHUNK_PATHS):
+    """Chance of reaching `goal_amount` (today's money) in `timeframe` years.
+
+    Returns the success probability, the median inflated goal, and corpus
+    percentile bands at the end of each year ({percentile: array}). Raises
+    ValueError for a timeframe under one year.
+    """
+    years = int(timeframe)
+    if years < 1:
+        raise ValueError(f"Timeframe must be at least 1 year, got {timeframe}")
+    args = (years, monthly_saving, goal_amount, initial, mean_return, volatility,
+            inflation, inflation_volatility)
+    if paths <= chunk_paths or workers <= 1:
+        corpus, goal = _simulate_chunk(seed, paths, *args)
+    else:
+        sizes = [chunk_paths] * (paths // chunk_paths)
+        if paths % chunk_paths:
+            sizes.append(paths % chunk_paths)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, seeds, sizes, *[[a] * len(sizes) for a in args]))
+        corpus = np.concatenate([c for c, _ in results])
+        goal = np.concatenate([g for _, g in results])
+
+    bands = np.percentile(corpus, PERCENTILES, axis=0)
+    return {
+        "success_probability": float(np.mean(corpus[:, -1] >= goal)),
+        "median_goal": float(np.median(goal)),
+        "years": np.arange(1, years + 1),
+        "bands": dict(zip(PERCENTILES, bands)),
+    }
+
+
+def simulate_plan(plan_data, **kwargs):
+    """Simulate a chatbot2 plan: its saving, capped at what income minus expenses allows"""
+    if int(plan_data["timeframe"]) < 1:
+        raise ValueError(f"Timeframe must be at least 1 year, got {plan_data['timeframe']}")
+    _, required = project(plan_data["goal_amount"], plan_data["timeframe"])
+    saving = plan_data.get("monthly_saving_amount") or required
+    saving = min(saving, max(plan_data["income"] - plan_data["expenses"], 0))
+    return simulate(plan_data["goal_amount"], plan_data["timeframe"], saving, **kwargs)
+
+
+if __name__ == "__main__":
+    # Single-core latency for 10k paths x 50 years of monthly steps (target
+    # under 100 ms), then a larger run chunked over the process pool
+    import time
+
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        result = simulate(5_000_000, 50, 2_000, paths=10_000, seed=1, workers=1)
+        best = min(best, time.perf_counter() - started)
+    verdict = "ok" if best < 0.1 else "SLOWER THAN TARGET"
+    print(f"10000 paths x 600 months: {best * 1000:.1f} ms ({verdict}), "
+          f"success {result['success_probability']:.1%}")
+
+    started = time.perf_counter()
+    result = simulate(5_000_000, 50, 2_000, paths=400_000, seed=1)
+    print(f"400000 paths over {MC_WORKERS} workers: {time.perf_counter() - started:.2f} s, "
+          f"success {result['success_probability']:.1%}")
@@ -0,0 +1,224 @@
+import os
+import codecs
+import asyncio
+import threading
+from html.parser import HTMLParser
+import aiohttp
+from bs4 import BeautifulSoup
+from ttl_cache import TTLCache, MemoryBackend, SQLiteBackend
+
+# News API configuration
+NEWS_API_KEY = os.getenv("NEWS_API_KEY")  # Get from https://newsapi.org/
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Seconds before a single request is abandoned
+REQUEST_TIMEOUT = float(os.getenv("NEWS_REQUEST_TIMEOUT", "10"))
+# Extra attempts after a timeout, connection error, 429 or 5xx
+REQUEST_RETRIES = int(os.getenv("NEWS_REQUEST_RETRIES", "2"))
+# Open connections in total and towards any one news site
+MAX_CONNECTIONS = int(os.getenv("NEWS_MAX_CONNECTIONS", "32"))
+MAX_PER_HOST = int(os.getenv("NEWS_MAX_PER_HOST", "4"))
+
+# How long NewsAPI results are reused for the same query (seconds)
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "900"))
+# Set to a file path to keep cached NewsAPI results across restarts
+NEWS_CACHE_DB = os.getenv("NEWS_CACHE_DB")
+
+# Read article pages chunk by chunk and hang up once enough text is collected
+STREAM_ARTICLES = os.getenv("NEWS_STREAM_ARTICLES", "1") == "1"
+STREAM_CHUNK_BYTES = 16 * 1024
+
+ARTICLE_CHARS = 5000
+
+
+class NewsError(Exception):
+    pass
+
+
+def default_news_cache():
+    backend = SQLiteBackend(NEWS_CACHE_DB) if NEWS_CACHE_DB else MemoryBackend(maxsize=512)
+    return TTLCache(NEWS_CACHE_TTL, backend)
+
+
+def extract_text(html, limit=ARTICLE_CHARS):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Try to find article text using common tags
+    parts = []
+    for paragraph in soup.find_all(['p', 'article', 'div.main-content']):
+        parts.append(paragraph.get_text() + "\n")
+
+    return "".join(parts)[:limit]
+
+
+class ArticleTextParser(HTMLParser):
+    """Incremental counterpart of extract_text.
+
+    Collects the text inside <p> and <article> elements as markup is fed in,
+    and reports `done` once `limit` characters are in hand. Text nested in
+    an <article> is only taken once, and <p> tags left open are closed by the
+    next one, as browsers do.
+    """
+
+    TAGS = {"p", "article"}
+    SKIP = {"script", "style", "noscript", "template"}
+
+    def __init__(self, limit=ARTICLE_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.size = 0
+        self._parts = []
+        self._open = []
+        self._skip = 0
+
+    @property
+    def done(self):
+        return self.size >= self.limit
+
+    def _append(self, text):
+        self._parts.append(text)
+        self.size += len(text)
+
+    def _close(self, tag):
+        while self._open:
+            if self._open.pop() == tag:
+                break
+        if not self._open:
+            self._append("\n")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.TAGS:
+            if tag == "p" and self._open and self._open[-1] == "p":
+                self._close("p")
+            self._open.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in self.TAGS and tag in self._open:
+            self._close(tag)
+
+    def handle_data(self, data):
+        if self._open and not self._skip:
+            self._append(data)
+
+    def text(self):
+        return "".join(self._parts)[:self.limit]
+
+
+class NewsFetcher:
+    """NewsAPI queries and article scraping over one pooled aiohttp session.
+
+    The session lives on a private event loop thread, so every Streamlit
+    session shares the same connection pool and the blocking methods below
+    can be called from any thread. NewsAPI results go through `cache`, so
+    concurrent sessions asking for the same ticker share one upstream call.
+    """
+
+    def __init__(self, api_key=NEWS_API_KEY, api_url=NEWS_API_URL, timeout=REQUEST_TIMEOUT,
+                 retries=REQUEST_RETRIES, max_connections=MAX_CONNECTIONS, max_per_host=MAX_PER_HOST,
+                 cache=None, stream=STREAM_ARTICLES, article_chars=ARTICLE_CHARS):
+        self.stream = stream
+        self.article_chars = article_chars
+        self.cache = cache if cache is not None else default_news_cache()
+        self.api_key = api_key
+        self.api_url = api_url
+        self.timeout = timeout
+        self.retries = retries
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self._loop = asyncio.new_event_loop()
+        self._session = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="news-fetcher", daemon=True)
+        self._thread.start()
+
+    def _run(self, coro):
+        # Leave some headroom for the retries before giving up on the caller's side
+        deadline = self.timeout * (self.retries + 1) * 2
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(deadline)
+
+    async def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; FinFlow news reader)"},
+            )
+        return self._session
+
+    async def _request(self, url, params=None, read=None):
+        """GET with retries on timeouts, connection errors, 429 and 5xx.
+
+        `read` turns the response into the result; it defaults to the body text.
+        """
+        session = await self._get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status == 429 or response.status >= 500:
+                        if attempt < self.retries:
+                            await asyncio.sleep(0.5 * 2 ** attempt)
+                            continue
+                    if response.status != 200:
+                        raise NewsError(f"{response.status} - {await response.text()}")
+                    return await (read or (lambda r: r.text()))(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise NewsError(f"{url}: {str(e) or type(e).__name__}") from e
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def fetch_news(self, params):
+        payload = await self._request(self.api_url, params={**params, 'apiKey': self.api_key},
+                                      read=lambda r: r.json())
+        return payload.get('articles', [])
+
+    async def _read_article(self, response):
+        parser = ArticleTextParser(self.article_chars)
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_BYTES):
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                # Leaving the response unread closes the connection, which is
+                # cheaper than downloading the rest of a multi-megabyte page
+                break
+        else:
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+        return parser.text()
+
+    async def fetch_article(self, url):
+        if self.stream:
+            return await self._request(url, read=self._read_article)
+        return extract_text(await self._request(url), self.article_chars)
+
+    async def fetch_articles(self, urls):
+        """Scrape every url concurrently; failures come back as NewsError instances"""
+        return await asyncio.gather(*(self.fetch_article(url) for url in urls), return_exceptions=True)
+
+    def get_news(self, ticker, page_size=5):
+        params = {
+            'q': ticker,
+            'language': 'en',
+            'sortBy': 'relevancy',
+            'pageSize': page_size
+        }
+        # The API key stays out of the cache key
+        key = TTLCache.make_key(self.api_url, **params)
+        try:
+            return self.cache.get_or_load(key, lambda: self._run(self.fetch_news(params)))
+        except NewsError as e:
+            raise NewsError(f"News API Error: {e}") from e
+
+    def scrape_articles(self, urls):
+        return self._run(self.fetch_articles(list(urls)))
+
+    def close(self):
+        if self._session is not None:
+            self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
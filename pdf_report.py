@@ -0,0 +1,124 @@
+import io
+import os
+import copy
+import hashlib
+import threading
+from fpdf import FPDF
+from fontTools import ttLib
+from ttl_cache import TTLCache, MemoryBackend
+
+PDF_FONT_PATH = os.getenv("PDF_FONT_PATH", "DejaVuSans.ttf")
+# Rendered reports kept in memory, keyed by the plan they were made from
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "128"))
+PDF_CACHE_TTL = float(os.getenv("PDF_CACHE_TTL", "3600"))
+
+
+def report_fields(financial_plan):
+    return [
+        ("Name", financial_plan.get("name", "")),
+        ("Monthly Income", f'₹{financial_plan.get("income", 0):,.2f}'),
+        ("Monthly Expenses", f'₹{financial_plan.get("expenses", 0):,.2f}'),
+        ("Financial Goal", financial_plan.get("goal_description", "")),
+        ("Target Amount", f'₹{financial_plan.get("goal_amount", 0):,.2f}'),
+        ("Adjusted Target", f'₹{financial_plan.get("adjusted_goal_amount", 0):,.2f}'),
+        ("Timeframe", f'{financial_plan.get("timeframe", 0)} years'),
+        ("Monthly Savings", f'₹{financial_plan.get("monthly_saving_amount", 0):,.2f}'),
+        ("Plan Details", financial_plan.get("financial_plan", ""))
+    ]
+
+
+def _to_bytes(data):
+    # fpdf2 returns a bytearray, the older PyFPDF a latin-1 string
+    return data.encode("latin-1") if isinstance(data, str) else bytes(data)
+
+
+class PDFRenderer:
+    """Financial plan reports rendered in memory.
+
+    The TrueType font is parsed once into a template document and its file
+    read once into memory. Each render starts from a copy of the template,
+    so concurrent sessions never share an FPDF or a file on disk. fpdf2
+    subsets the font tables in place on output and a copy still shares
+    them, so every copy gets its own tables, opened lazily from the bytes
+    in memory. Reports are cached by a hash of the fields they show.
+    """
+
+    def __init__(self, font_path=PDF_FONT_PATH, cache=None):
+        self.font_path = font_path
+        self.cache = cache if cache is not None else TTLCache(PDF_CACHE_TTL, MemoryBackend(PDF_CACHE_SIZE))
+        self._template = None
+        self._font_bytes = None
+        self._lock = threading.Lock()
+
+    def _new_document(self):
+        if self._template is None:
+            with self._lock:
+                if self._template is None:
+                    template = FPDF()
+                    template.add_font('DejaVu', '', self.font_path, uni=True)
+                    template.set_font('DejaVu', '', 12)
+                    with open(self.font_path, "rb") as f:
+                        self._font_bytes = f.read()
+                    self._template = template
+        pdf = copy.deepcopy(self._template)
+        for font in pdf.fonts.values():
+            font.ttfont = ttLib.TTFont(io.BytesIO(self._font_bytes), recalcTimestamp=False, lazy=True)
+        return pdf
+
+    def _render(self, fields):
+        pdf = self._new_document()
+        pdf.add_page()
+
+        # Title with Rupee symbol
+        pdf.cell(200, 10, txt="Financial Plan Report".encode('latin-1').decode('latin-1'), ln=True, align='C')
+        pdf.ln(10)
+
+        for label, value in fields:
+            text = f"{label}: {value}"
+            # Handle Unicode characters properly
+            pdf.multi_cell(0, 10, txt=text.encode('latin-1', 'replace').decode('latin-1'))
+            pdf.ln(5)
+
+        return _to_bytes(pdf.output(dest='S'))
+
+    def render(self, financial_plan):
+        """The report for `financial_plan` (chatbot2's plan_data) as PDF bytes"""
+        fields = report_fields(financial_plan)
+        key = hashlib.sha256(TTLCache.make_key(fields).encode()).hexdigest()
+        return self.cache.get_or_load(key, lambda: self._render(fields))
+
+
+if __name__ == "__main__":
+    # PDFs per second: font parsed on every call (the old generate_pdf),
+    # template copy, and a repeat of an already rendered plan; plus a check
+    # that plans with different characters all render
+    import time
+    import argparse
+    import warnings
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--font", default=PDF_FONT_PATH)
+    parser.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    plans = [{"name": f"User {i}", "income": 120000.0, "expenses": 45000.0, "goal_description": "Buy a house",
+              "goal_amount": 5000000.0, "adjusted_goal_amount": 6719581.69, "timeframe": 10,
+              "monthly_saving_amount": 55996.51,
+              "financial_plan": "\n".join(f"{i}. Put part of every salary into an index fund." for i in range(60))}
+             for i in range(args.n)]
+
+    renderer = PDFRenderer(args.font)
+    for name in ("Alice", "Bob", "Zoë Ωmega"):
+        assert renderer.render({"name": name}).startswith(b"%PDF"), name
+
+    def per_call_font(plan):
+        renderer = PDFRenderer(args.font, cache=TTLCache(0, MemoryBackend(1)))
+        return renderer._render(report_fields(plan))
+
+    for label, render in (("font per call", per_call_font), ("template", renderer.render),
+                          ("cached", renderer.render)):
+        started = time.perf_counter()
+        for plan in plans:
+            render(plan)
+        print(f"{label:14} {args.n / (time.perf_counter() - started):8.1f} PDFs/s")
@@ -0,0 +1,190 @@
+import os
+import time
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from planner import PROFILE_FIELDS
+from ttl_cache import TTLCache
+
+# Plans generated at the same time across all sessions
+PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "4"))
+# Finished jobs are forgotten after this long (seconds)
+PLAN_JOB_TTL = int(os.getenv("PLAN_JOB_TTL", "3600"))
+# Callers stop waiting on a job after this long (seconds)
+PLAN_JOB_TIMEOUT = float(os.getenv("PLAN_JOB_TIMEOUT", "300"))
+# Set to e.g. redis://localhost:6379/0 to keep jobs in Redis instead of memory
+PLAN_JOB_REDIS_URL = os.getenv("PLAN_JOB_REDIS_URL")
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class MemoryJobStore:
+    """Jobs kept in this process"""
+
+    def __init__(self, ttl=PLAN_JOB_TTL):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j for j, job in self._jobs.items()
+                       if job["status"] in (DONE, FAILED) and job["updated_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def create(self, job_id):
+        """Register a pending job, False if a live job already has this id"""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] != FAILED:
+                return False
+            self._jobs[job_id] = {"status": PENDING, "chunks": [], "error": "", "updated_at": time.time()}
+            return True
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields, updated_at=time.time())
+
+    def append(self, job_id, chunk):
+        with self._lock:
+            self._jobs[job_id]["chunks"].append(chunk)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {"status": job["status"], "text": "".join(job["chunks"]), "error": job["error"]}
+
+
+def _text(value):
+    # Clients return bytes by default and str with decode_responses=True
+    if value is None:
+        return ""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisJobStore:
+    """Jobs kept in Redis, shared by every app process.
+
+    Takes any redis-py compatible client, with or without
+    decode_responses, so a local stand-in such as fakeredis works the same
+    way in tests.
+    """
+
+    def __init__(self, client, ttl=PLAN_JOB_TTL, prefix="plan_job:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, job_id):
+        return self.prefix + job_id, self.prefix + job_id + ":text"
+
+    def create(self, job_id):
+        meta, text = self._keys(job_id)
+        if not self.client.hsetnx(meta, "status", PENDING):
+            if _text(self.client.hget(meta, "status")) != FAILED:
+                return False
+        pipe = self.client.pipeline()
+        pipe.hset(meta, mapping={"status": PENDING, "error": ""})
+        pipe.delete(text)
+        pipe.expire(meta, self.ttl)
+        pipe.execute()
+        return True
+
+    def update(self, job_id, **fields):
+        meta, _ = self._keys(job_id)
+        pipe = self.client.pipeline()
+        pipe.hset(meta, mapping=fields)
+        pipe.expire(meta, self.ttl)
+        pipe.execute()
+
+    def append(self, job_id, chunk):
+        _, text = self._keys(job_id)
+        pipe = self.client.pipeline()
+        pipe.append(text, chunk.encode())
+        pipe.expire(text, self.ttl)
+        pipe.execute()
+
+    def get(self, job_id):
+        meta, text = self._keys(job_id)
+        fields = self.client.hgetall(meta)
+        if not fields:
+            return None
+        fields = {_text(k): _text(v) for k, v in fields.items()}
+        return {"status": fields["status"], "text": _text(self.client.get(text)),
+                "error": fields.get("error", "")}
+
+
+def default_job_store():
+    if PLAN_JOB_REDIS_URL:
+        import redis
+        return RedisJobStore(redis.Redis.from_url(PLAN_JOB_REDIS_URL))
+    return MemoryJobStore()
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class PlanJobQueue:
+    """Runs plan generation on a worker pool, outside the Streamlit script.
+
+    The UI submits a profile, keeps the job id and polls `get` for the text
+    streamed so far, so a rerun in the middle of generation loses nothing.
+    A session submitting the same inputs again gets the existing job back.
+    """
+
+    def __init__(self, generator, store=None, max_workers=PLAN_JOB_WORKERS):
+        self.generator = generator
+        self.store = store if store is not None else default_job_store()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-job")
+
+    @staticmethod
+    def job_id(session_id, profile):
+        inputs = TTLCache.make_key(session_id, **{field: profile[field] for field in PROFILE_FIELDS})
+        return hashlib.sha256(inputs.encode()).hexdigest()[:32]
+
+    def submit(self, session_id, profile):
+        profile = {field: profile[field] for field in PROFILE_FIELDS}
+        job_id = self.job_id(session_id, profile)
+        if self.store.create(job_id):
+            self._pool.submit(self._run, job_id, profile)
+        return job_id
+
+    def _run(self, job_id, profile):
+        self.store.update(job_id, status=RUNNING)
+        try:
+            for chunk in self.generator.stream(profile):
+                self.store.append(job_id, chunk)
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e))
+        else:
+            self.store.update(job_id, status=DONE)
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, poll_interval=0.2, on_progress=None, timeout=PLAN_JOB_TIMEOUT):
+        """Poll until the job finishes, calling `on_progress(text)` as text grows.
+
+        Gives up after `timeout` seconds with a failed result; the job keeps
+        running and a later submit of the same inputs picks it up again.
+        """
+        deadline = time.monotonic() + timeout
+        seen = ""
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return {"status": FAILED, "text": "", "error": "Job expired"}
+            if on_progress is not None and job["text"] != seen:
+                seen = job["text"]
+                on_progress(seen)
+            if job["status"] in (DONE, FAILED):
+                return job
+            if time.monotonic() >= deadline:
+                return {"status": FAILED, "text": job["text"],
+                        "error": f"Timed out after {timeout:g}s waiting for the plan"}
+            time.sleep(poll_interval)
@@ -0,0 +1,124 @@
+import os
+import re
+from ttl_cache import TTLCache, MemoryBackend, SQLiteBackend
+from projection import inflation_adjusted
+
+# Generated plans are reused for identical profiles for this long (seconds)
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", str(7 * 24 * 3600)))
+# Most plans kept before the least recently used ones are dropped
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "512"))
+# Set to a file path to keep generated plans across restarts
+PLAN_CACHE_DB = os.getenv("PLAN_CACHE_DB")
+# Round income, expenses and goal amount to this many rupees before looking a
+# plan up, so near-identical profiles share one; 0 keeps amounts exact
+PLAN_CACHE_BUCKET = float(os.getenv("PLAN_CACHE_BUCKET", "0"))
+# Share plans between users whose profiles only differ by name
+PLAN_CACHE_IGNORE_NAME = os.getenv("PLAN_CACHE_IGNORE_NAME", "0") == "1"
+
+NAME_PLACEHOLDER = "{{client_name}}"
+
+PROFILE_FIELDS = ("name", "income", "expenses", "goal_description", "goal_amount", "timeframe")
+
+
+def build_plan_prompt(profile):
+    current_goal = profile['goal_amount']
+    timeframe = profile['timeframe']
+    adjusted_goal = float(inflation_adjusted(current_goal, timeframe))
+
+    return f"""
+    Create a comprehensive financial plan considering 3% annual inflation for {profile['name']}:
+    - Current Monthly Income: ₹{profile['income']:,.2f}
+    - Monthly Expenses: ₹{profile['expenses']:,.2f}
+    - Financial Goal: {profile['goal_description']}
+    - Current Target Amount: ₹{current_goal:,.2f}
+    - Inflation-adjusted Target ({timeframe} years): ₹{adjusted_goal:,.2f}
+    - Timeframe: {timeframe} years
+
+    Include:
+    1. Inflation-adjusted savings strategy
+    2. Investment recommendations accounting for inflation
+    3. Expense optimization tips
+    4. Risk management strategies
+    5. Progress tracking considering inflation
+    6. Alternative scenarios
+    """
+
+
+def normalize_profile(profile, bucket=0, ignore_name=False):
+    """The profile a plan is generated and cached for.
+
+    With `bucket`, amounts are rounded to the nearest multiple so the prompt
+    and the cache key agree on the values the plan talks about.
+    """
+    normalized = {field: profile[field] for field in PROFILE_FIELDS}
+    if bucket:
+        for field in ("income", "expenses", "goal_amount"):
+            normalized[field] = round(profile[field] / bucket) * bucket
+    if ignore_name:
+        normalized["name"] = NAME_PLACEHOLDER
+    return normalized
+
+
+def default_plan_cache():
+    if PLAN_CACHE_DB:
+        backend = SQLiteBackend(PLAN_CACHE_DB, maxsize=PLAN_CACHE_SIZE)
+    else:
+        backend = MemoryBackend(maxsize=PLAN_CACHE_SIZE)
+    return TTLCache(PLAN_CACHE_TTL, backend)
+
+
+class PlanGenerator:
+    """Gemini plan generation behind a prompt-keyed response cache.
+
+    `model` is anything with a `generate_content(prompt, stream=False)` that
+    returns an object with `.text`, or an iterable of them when streaming,
+    so tests can pass a fake.
+    """
+
+    def __init__(self, model, cache=None, bucket=PLAN_CACHE_BUCKET, ignore_name=PLAN_CACHE_IGNORE_NAME):
+        self.model = model
+        self.cache = cache if cache is not None else default_plan_cache()
+        self.bucket = bucket
+        self.ignore_name = ignore_name
+
+    def _prepare(self, profile):
+        normalized = normalize_profile(profile, self.bucket, self.ignore_name)
+        prompt = build_plan_prompt({**normalized, "name": profile["name"]})
+        return TTLCache.make_key(build_plan_prompt(normalized)), prompt
+
+    def _to_cache(self, text, name):
+        # Shared plans are stored with the name swapped out for a placeholder,
+        # whole words only so "Sam" leaves "Samantha" alone
+        if not self.ignore_name or not name:
+            return text
+        return re.sub(rf"(?<!\w){re.escape(name)}(?!\w)", NAME_PLACEHOLDER, text)
+
+    def _from_cache(self, text, name):
+        return text.replace(NAME_PLACEHOLDER, name) if self.ignore_name else text
+
+    def generate(self, profile):
+        key, prompt = self._prepare(profile)
+        name = profile["name"]
+        text = self.cache.get_or_load(
+            key, lambda: self._to_cache(self.model.generate_content(prompt).text, name))
+        return self._from_cache(text, name)
+
+    def stream(self, profile):
+        """Yield the plan in chunks as Gemini produces them.
+
+        A cached plan comes back as a single chunk. A streamed plan is only
+        cached once the stream has finished, so an interrupted generation
+        never leaves a truncated plan behind.
+        """
+        key, prompt = self._prepare(profile)
+        name = profile["name"]
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield self._from_cache(cached, name)
+            return
+
+        chunks = []
+        for chunk in self.model.generate_content(prompt, stream=True):
+            chunks.append(chunk.text)
+            yield chunk.text
+        self.cache.set(key, self._to_cache("".join(chunks), name))
@@ -0,0 +1,334 @@
+import os
+import re
+import time
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# Where cached OHLCV frames live, one file per ticker
+PRICE_CACHE_DIR = os.getenv("PRICE_CACHE_DIR", ".price_cache")
+
+# Don't ask the provider for new bars more often than this (seconds)
+REFRESH_INTERVAL = int(os.getenv("PRICE_REFRESH_INTERVAL", "900"))
+
+# Upper bound on parallel requests when a provider has no grouped download
+FETCH_WORKERS = int(os.getenv("PRICE_FETCH_WORKERS", "8"))
+
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def period_start(end, period):
+    """Earliest timestamp covered by a yfinance style period ("5d", "6mo", "2y")"""
+    if period in (None, "max"):
+        return None
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    amount, unit = match.groups()
+    return end - pd.DateOffset(**{_PERIOD_UNITS[unit]: int(amount)})
+
+
+def _since(df, start):
+    # yfinance returns exchange-local, tz-aware indexes
+    start = pd.Timestamp(start)
+    if df.index.tz is not None and start.tzinfo is None:
+        start = start.tz_localize(df.index.tz)
+    return df[df.index >= start]
+
+
+def _align_tz(new, cached):
+    # Grouped downloads come back tz-naive while Ticker.history is tz-aware
+    if cached.index.tz is not None and new.index.tz is None:
+        return new.tz_localize(cached.index.tz)
+    if cached.index.tz is None and new.index.tz is not None:
+        return new.tz_localize(None)
+    return new
+
+
+def _fan_out(provider, tickers, **kwargs):
+    """Per-ticker fetches spread over a bounded thread pool"""
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(tickers))) as pool:
+        frames = pool.map(lambda t: provider.history(t, **kwargs), tickers)
+        return dict(zip(tickers, frames))
+
+
+class YahooProvider:
+    """Daily bars straight from Yahoo Finance"""
+
+    def history(self, ticker, period=None, start=None):
+        if start is not None:
+            return yf.Ticker(ticker).history(start=start)
+        return yf.Ticker(ticker).history(period=period)
+
+    def history_many(self, tickers, period=None, start=None):
+        """All tickers in one grouped download"""
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        data = yf.download(tickers, period=None if start else period, start=start,
+                           group_by="ticker", auto_adjust=True, actions=True,
+                           threads=True, progress=False)
+        frames = {}
+        for ticker in tickers:
+            if ticker in data.columns.get_level_values(0):
+                frames[ticker] = data[ticker].dropna(how="all")
+            else:
+                frames[ticker] = pd.DataFrame()
+        return frames
+
+
+class LocalProvider:
+    """Serves bars from frames saved on disk, used for tests and offline runs.
+
+    `latency` adds a fixed delay per call so a recorded fixture can stand in
+    for the network round-trip in benchmarks.
+    """
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = directory
+        self.latency = latency
+
+    def _read(self, ticker, period=None, start=None):
+        df = read_frame(os.path.join(self.directory, _file_stem(ticker)))
+        if df is None or df.empty:
+            return pd.DataFrame()
+        if start is not None:
+            return _since(df, start)
+        first = period_start(df.index[-1], period)
+        return df if first is None else _since(df, first)
+
+    def history(self, ticker, period=None, start=None):
+        time.sleep(self.latency)
+        return self._read(ticker, period, start)
+
+    def history_many(self, tickers, period=None, start=None):
+        time.sleep(self.latency)
+        return {t: self._read(t, period, start) for t in tickers}
+
+
+def _covers(df, period):
+    # Only a longer period than we hold needs a full download. A few days of
+    # slack absorb weekends and exchange holidays at the start of the window.
+    if df.empty:
+        return False
+    first = period_start(df.index[-1], period)
+    return first is not None and df.index[0] <= first + pd.Timedelta(days=7)
+
+
+def _merge(cached, new):
+    # Re-fetched days replace the stored ones, they may have been partial bars
+    if new.empty:
+        return cached
+    if cached.empty:
+        return new
+    new = _align_tz(new, cached)
+    df = pd.concat([cached[cached.index < new.index[0]], new])
+    return df[~df.index.duplicated(keep="last")]
+
+
+def _file_stem(ticker):
+    # Tickers such as "M&M.BO" or "BRK-B" must map to safe file names
+    return re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+
+
+def read_frame(stem):
+    """Frame saved by write_frame under `stem` (no extension), or None"""
+    if os.path.exists(stem + ".parquet"):
+        return pd.read_parquet(stem + ".parquet")
+    if os.path.exists(stem + ".pkl"):
+        return pd.read_pickle(stem + ".pkl")
+    return None
+
+
+def _write_atomic(write, path):
+    # Written next to the target and renamed over it, so a reader in another
+    # thread or process sees the old file or the new one, never half of one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_frame(df, stem):
+    try:
+        _write_atomic(df.to_parquet, stem + ".parquet")
+    except ImportError:
+        # No parquet engine installed, pickle keeps the index and dtypes intact
+        _write_atomic(df.to_pickle, stem + ".pkl")
+
+
+class PriceStore:
+    """OHLCV cache that only asks the provider for bars it doesn't have.
+
+    Frames are persisted per ticker on disk and kept in memory once loaded,
+    so a warmed-up universe is served without any I/O.
+    """
+
+    def __init__(self, provider=None, directory=PRICE_CACHE_DIR, refresh_interval=REFRESH_INTERVAL):
+        self.provider = provider or YahooProvider()
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self._frames = {}
+        self._refreshed_at = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+        # Message of the last failed background refresh, "" once one succeeds
+        self.last_error = ""
+        os.makedirs(directory, exist_ok=True)
+
+    def _stem(self, ticker):
+        return os.path.join(self.directory, _file_stem(ticker))
+
+    def _is_fresh(self, ticker):
+        refreshed_at = self._refreshed_at.get(ticker)
+        if refreshed_at is None:
+            stem = self._stem(ticker)
+            for ext in (".parquet", ".pkl"):
+                if os.path.exists(stem + ext):
+                    refreshed_at = os.path.getmtime(stem + ext)
+                    break
+            else:
+                return False
+        return time.time() - refreshed_at < self.refresh_interval
+
+    def load(self, ticker):
+        """Cached bars for a ticker, without touching the provider"""
+        df = self._frames.get(ticker)
+        if df is None:
+            df = read_frame(self._stem(ticker))
+            if df is None:
+                return pd.DataFrame()
+            self._frames[ticker] = df
+        return df
+
+    def save(self, ticker, df):
+        write_frame(df, self._stem(ticker))
+        with self._lock:
+            self._frames[ticker] = df
+            self._refreshed_at[ticker] = time.time()
+
+    def refresh(self, ticker, period="2y"):
+        """Bring the cached bars up to date and return the full cached frame"""
+        cached = self.load(ticker)
+        if not _covers(cached, period):
+            df = self.provider.history(ticker, period=period)
+        else:
+            last = cached.index[-1]
+            df = _merge(cached, self.provider.history(ticker, start=last.strftime("%Y-%m-%d")))
+
+        if not df.empty:
+            self.save(ticker, df)
+        return df
+
+    def warm(self, tickers, period="2y"):
+        """Refresh a whole universe with at most two grouped provider calls.
+
+        Tickers we don't hold yet get one full download for `period`, the rest
+        share one incremental download from the oldest last stored bar.
+        """
+        missing, stale = [], {}
+        for ticker in tickers:
+            cached = self.load(ticker)
+            if not _covers(cached, period):
+                missing.append(ticker)
+            elif not self._is_fresh(ticker):
+                stale[ticker] = cached
+
+        history_many = getattr(self.provider, "history_many", None)
+        if history_many is None:
+            history_many = lambda ts, **kw: _fan_out(self.provider, ts, **kw)
+
+        if missing:
+            for ticker, df in history_many(missing, period=period).items():
+                if not df.empty:
+                    self.save(ticker, df)
+        if stale:
+            start = min(df.index[-1] for df in stale.values()).strftime("%Y-%m-%d")
+            for ticker, new in history_many(list(stale), start=start).items():
+                self.save(ticker, _merge(stale[ticker], new))
+
+    def start_refresher(self, tickers, period="2y", interval=None):
+        """Warm `tickers` now and keep them warm from a daemon thread"""
+        if self._refresher is not None:
+            return self._refresher
+        interval = interval or self.refresh_interval
+
+        def loop():
+            while True:
+                try:
+                    self.warm(tickers, period)
+                    self.last_error = ""
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.warning("Price refresh failed: %s", e)
+                time.sleep(interval)
+
+        self._refresher = threading.Thread(target=loop, name="price-refresher", daemon=True)
+        self._refresher.start()
+        return self._refresher
+
+    def closes(self, tickers=None):
+        """Close prices of the in-memory universe as one wide frame"""
+        tickers = list(self._frames) if tickers is None else tickers
+        frames = {t: self.load(t) for t in tickers}
+        return pd.DataFrame({t: df["Close"] for t, df in frames.items() if not df.empty})
+
+    def get(self, ticker, period="2y"):
+        df = self.load(ticker) if self._is_fresh(ticker) else pd.DataFrame()
+        if not _covers(df, period):
+            df = self.refresh(ticker, period)
+        if df.empty:
+            return df
+        first = period_start(df.index[-1], period)
+        return df if first is None else _since(df, first)
+
+
+if __name__ == "__main__":
+    # Benchmark sequential per-ticker refreshes against the grouped warm-up.
+    #   python price_store.py --record fixtures/prices   (needs network, once)
+    #   python price_store.py --fixture fixtures/prices --latency 0.3
+    import argparse
+    import shutil
+    from universe import stocks
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="download the universe into this directory")
+    parser.add_argument("--fixture", help="directory of recorded frames to replay")
+    parser.add_argument("--latency", type=float, default=0.3,
+                        help="simulated provider round-trip per call (seconds)")
+    parser.add_argument("--period", default="2y")
+    args = parser.parse_args()
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+        for ticker, df in YahooProvider().history_many(stocks, period=args.period).items():
+            write_frame(df, os.path.join(args.record, _file_stem(ticker)))
+        print(f"Recorded {len(stocks)} tickers to {args.record}")
+
+    if args.fixture:
+        provider = LocalProvider(args.fixture, latency=args.latency)
+        for label, run in [
+            ("sequential", lambda store: [store.refresh(t, args.period) for t in stocks]),
+            ("batched", lambda store: store.warm(stocks, args.period)),
+        ]:
+            directory = tempfile.mkdtemp()
+            try:
+                store = PriceStore(provider, directory)
+                started = time.perf_counter()
+                run(store)
+                elapsed = time.perf_counter() - started
+                print(f"{label:>10}: {len(stocks)} tickers in {elapsed:.2f}s")
+            finally:
+                shutil.rmtree(directory)
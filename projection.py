@@ -0,0 +1,98 @@
+import os
+import numpy as np
+import pandas as pd
+
+INFLATION_RATE = 0.03
+# Annual return assumed on money already saved; 0 means savings just
+# accumulate, which is what the plans have always quoted
+EXPECTED_RETURN = float(os.getenv("PLAN_EXPECTED_RETURN", "0"))
+
+# Alternative scenarios: multiples of the goal amount, years added to the
+# timeframe, and the inflation and return rates tried for each
+SCENARIO_AMOUNT_FACTORS = (0.5, 0.75, 1.0, 1.25, 1.5)
+SCENARIO_YEAR_OFFSETS = (-2, -1, 0, 1, 2, 3, 5, 10)
+SCENARIO_INFLATION_RATES = (0.03, 0.05, 0.07)
+SCENARIO_RETURN_RATES = (0.0, 0.04, 0.08, 0.12)
+
+
+def inflation_adjusted(amount, years, inflation=INFLATION_RATE):
+    """What `amount` in today's money costs after `years` of inflation"""
+    return np.asarray(amount, dtype=float) * (1 + np.asarray(inflation, dtype=float)) ** years
+
+
+def required_monthly_saving(amount, years, inflation=INFLATION_RATE, annual_return=EXPECTED_RETURN):
+    """Monthly contribution that reaches the inflation-adjusted `amount` in `years`.
+
+    Contributions are made at the end of each month and compound monthly at
+    `annual_return`, so this is the sinking-fund payment
+    target * r / ((1 + r) ** n - 1), falling back to target / n when r is 0.
+    Every argument may be a scalar or an array; they broadcast together.
+    """
+    target = inflation_adjusted(amount, years, inflation)
+    months = np.asarray(years, dtype=float) * 12
+    rate = (1 + np.asarray(annual_return, dtype=float)) ** (1 / 12) - 1
+    growth = np.expm1(months * np.log1p(rate))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = np.where(rate != 0, target * rate / growth, target / months)
+    return payment
+
+
+def project(amount, years, inflation=INFLATION_RATE, annual_return=EXPECTED_RETURN):
+    """(inflation-adjusted target, required monthly saving) as plain floats.
+
+    Raises ValueError for a timeframe under one year, where no monthly
+    saving is defined.
+    """
+    if years < 1:
+        raise ValueError(f"Timeframe must be at least 1 year, got {years}")
+    target = inflation_adjusted(amount, years, inflation)
+    monthly = required_monthly_saving(amount, years, inflation, annual_return)
+    return float(target), float(monthly)
+
+
+def scenario_grid(amount, years, amount_factors=SCENARIO_AMOUNT_FACTORS,
+                  year_offsets=SCENARIO_YEAR_OFFSETS, inflation_rates=SCENARIO_INFLATION_RATES,
+                  return_rates=SCENARIO_RETURN_RATES):
+    """Every combination of goal amount, timeframe, inflation and return.
+
+    The grid is built by broadcasting, so all points are computed in one
+    call. Timeframes shorter than a year are left out.
+    """
+    amounts = np.asarray(amount_factors, dtype=float)[:, None, None, None] * amount
+    timeframes = years + np.asarray(year_offsets, dtype=float)[None, :, None, None]
+    inflations = np.asarray(inflation_rates, dtype=float)[None, None, :, None]
+    returns = np.asarray(return_rates, dtype=float)[None, None, None, :]
+    amounts, timeframes, inflations, returns = np.broadcast_arrays(amounts, timeframes, inflations, returns)
+
+    keep = timeframes >= 1
+    amounts, timeframes = amounts[keep], timeframes[keep]
+    inflations, returns = inflations[keep], returns[keep]
+    return pd.DataFrame({
+        "Goal Amount": amounts,
+        "Years": timeframes.astype(int),
+        "Inflation": inflations,
+        "Return": returns,
+        "Adjusted Goal": inflation_adjusted(amounts, timeframes, inflations),
+        "Monthly Saving": required_monthly_saving(amounts, timeframes, inflations, returns),
+    })
+
+
+if __name__ == "__main__":
+    # Grid throughput compared with the per-scenario Python loop it replaces
+    import time
+    import itertools
+
+    started = time.perf_counter()
+    for _ in range(100):
+        grid = scenario_grid(500_000, 10)
+    vector_elapsed = (time.perf_counter() - started) / 100
+
+    started = time.perf_counter()
+    rows = []
+    for factor, offset, inflation, ret in itertools.product(
+            SCENARIO_AMOUNT_FACTORS, SCENARIO_YEAR_OFFSETS, SCENARIO_INFLATION_RATES, SCENARIO_RETURN_RATES):
+        if 10 + offset >= 1:
+            rows.append(project(500_000 * factor, 10 + offset, inflation, ret))
+    loop_elapsed = time.perf_counter() - started
+
+    print(f"{len(grid)} scenarios: grid {vector_elapsed * 1000:.2f} ms, loop {loop_elapsed * 1000:.2f} ms")
@@ -0,0 +1,158 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from textblob import TextBlob
+from textblob.en import sentiment as _pattern
+
+# "lexicon" (precompiled word table, fast) or "textblob" (one TextBlob per text)
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "lexicon")
+# Scores remembered by content hash
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "4096"))
+
+NEGATIONS = frozenset(_pattern.negations)
+
+# The tokens TextBlob's tokenizer produces that matter for scoring. Like it,
+# contractions come apart as "is", "n", "'", "t", so "isn't" does not negate.
+_TOKEN = re.compile(r"[a-z0-9]+(?=n't)|[a-z0-9]+(?:[-.][a-z0-9]+)*|'|!")
+
+
+def _compile_lexicon():
+    # word -> (polarity, intensity, is_modifier), taken from TextBlob's own
+    # lexicon and averaged over word senses exactly as TextBlob does
+    _pattern.load()
+    lexicon = {}
+    for word, senses in _pattern.items():
+        polarity, _, intensity = senses[None]
+        is_modifier = any(pos in senses for pos in _pattern.modifiers)
+        lexicon[word] = (polarity, intensity, is_modifier)
+    return lexicon
+
+
+LEXICON = _compile_lexicon()
+
+
+def _clamp(value):
+    return max(-1.0, min(value, 1.0))
+
+
+def lexicon_polarity(text):
+    """TextBlob's pattern polarity (-1..1) computed from the precompiled lexicon.
+
+    Follows the same rules: modifiers scale the next known word ("very good"),
+    negations flip and halve it ("not good"), "!" boosts the previous one.
+    Emoticons and the "(!)" irony marker are not scored.
+    """
+    scored = []  # [polarity, intensity, negated]
+    modifier = negation = None
+    for word in _TOKEN.findall(text.lower()):
+        entry = LEXICON.get(word)
+        if entry is not None:
+            polarity, intensity, is_modifier = entry
+            if modifier is None:
+                scored.append([polarity, intensity, False])
+            else:
+                scored[-1][0] = _clamp(polarity * scored[-1][1])
+                scored[-1][1] = intensity
+            if negation is not None:
+                scored[-1][1] = 1.0 / scored[-1][1]
+                scored[-1][2] = True
+            modifier = word if is_modifier else None
+            negation = word if word in NEGATIONS else None
+        else:
+            if word in NEGATIONS:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and (
+                    LEXICON[modifier][2] or modifier.endswith("ly")):
+                scored[-1][2] = True
+                negation = None
+            elif modifier and len(word) > 2:
+                modifier = None
+            if word == "!" and scored:
+                scored[-1][0] = _clamp(scored[-1][0] * 1.25)
+    if not scored:
+        return 0.0
+    return sum(p * -0.5 if negated else p for p, _, negated in scored) / len(scored)
+
+
+def textblob_polarity(text):
+    return TextBlob(text).sentiment.polarity
+
+
+SCORERS = {"lexicon": lexicon_polarity, "textblob": textblob_polarity}
+
+
+class SentimentScorer:
+    """Batch polarity scoring with results memoised by content hash"""
+
+    def __init__(self, backend=SENTIMENT_BACKEND, maxsize=SENTIMENT_CACHE_SIZE):
+        if backend not in SCORERS:
+            raise ValueError(f"Unknown sentiment backend: {backend}")
+        self.backend = backend
+        self.maxsize = maxsize
+        self._score = SCORERS[backend]
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=16).digest()
+
+    def score_many(self, texts):
+        """Polarity between -1 (negative) and 1 (positive) for each text, in order"""
+        digests = [self._digest(text) for text in texts]
+        scores, pending = {}, {}
+        with self._lock:
+            for digest, text in zip(digests, texts):
+                if digest in self._memo:
+                    self._memo.move_to_end(digest)
+                    scores[digest] = self._memo[digest]
+                else:
+                    pending[digest] = text
+
+        # Score outside the lock, each distinct text only once
+        for digest, text in pending.items():
+            scores[digest] = self._score(text)
+
+        with self._lock:
+            for digest in pending:
+                self._memo[digest] = scores[digest]
+            while len(self._memo) > self.maxsize:
+                self._memo.popitem(last=False)
+        return [scores[digest] for digest in digests]
+
+    def score(self, text):
+        return self.score_many([text])[0]
+
+
+if __name__ == "__main__":
+    # Compare the per-call TextBlob path with the lexicon scorer and the memo
+    import time
+    import random
+
+    random.seed(0)
+    words = [w for w in LEXICON if w.isalpha()]
+    filler = "the company said its quarterly results were in line with the market".split()
+    texts = [" ".join(random.choice(words + filler * 20) for _ in range(400)) for _ in range(200)]
+
+    started = time.perf_counter()
+    reference = [textblob_polarity(text) for text in texts]
+    textblob_elapsed = time.perf_counter() - started
+
+    scorer = SentimentScorer("lexicon")
+    started = time.perf_counter()
+    fast = scorer.score_many(texts)
+    lexicon_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scorer.score_many(texts)
+    memo_elapsed = time.perf_counter() - started
+
+    gap = max(abs(a - b) for a, b in zip(reference, fast))
+    print(f"textblob per call: {len(texts) / textblob_elapsed:10.1f} texts/s")
+    print(f"lexicon batch:     {len(texts) / lexicon_elapsed:10.1f} texts/s")
+    print(f"memoised batch:    {len(texts) / memo_elapsed:10.1f} texts/s")
+    print(f"max polarity gap vs TextBlob: {gap:.4f}")
@@ -4,31 +4,9 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 import pandas as pd
 import plotly.express as px
-
-# Load tax rules from PDF (simplified)
-TAX_RULES = {
-    "HRA": {
-        "condition": lambda data: data["rent_paid"] > 0 and not data["hra_claimed"],
-        "suggestion": lambda _: "Claim HRA exemption using rent receipts",
-        "limit": "Actual HRA received, rent paid minus 10% of salary, or 50%/40%/30% of salary (metro/non-metro)"
-    },
-    "80C": {
-        "condition": lambda data: data["investment_80c"] < 150000,
-        "suggestion": lambda
-            data: f"Invest ₹{150000 - data['investment_80c']} more in LIC/PPF/ELSS for full 80C benefit",
-        "limit": "₹1.5 lakh"
-    },
-    "80D": {
-        "condition": lambda data: data["health_insurance"] == 0,
-        "suggestion": lambda _: "Buy health insurance to claim up to ₹25,000 deduction",
-        "limit": "₹25,000 (₹50,000 for seniors)"
-    },
-    "87A": {
-        "condition": lambda data: data["taxable_income"] <= 1200000,
-        "suggestion": lambda _: "You qualify for Section 87A rebate - ₹12,500 tax relief!",
-        "limit": "Taxable income ≤ ₹12L"
-    }
-}
+from tax_rules import RuleEngine
+from tax_calc import REGIMES, REGIME_TABLE, compare_regimes, tax_breakdown, slab_markdown
+from tax_optimizer import optimize
 
 TAX_GLOSSARY = {
     "80C": {
@@ -47,12 +25,18 @@ TAX_GLOSSARY = {
         "limit": "As per income tax slabs"
     },
     "Section 87A": {
-        "description": "Rebate for income under ₹12L",
-        "example": "If taxable income is ₹10L, pay ₹0 tax!",
-        "limit": "Available for incomes ≤ ₹12L"
+        "description": f"Rebate for taxable income up to ₹{REGIMES['new']['rebate_limit'] / 1e5:g}L "
+                       f"(₹{REGIMES['old']['rebate_limit'] / 1e5:g}L in the old regime)",
+        "example": f"If taxable income is ₹{REGIMES['new']['rebate_limit'] / 1e5:g}L, pay ₹0 tax in the new regime!",
+        "limit": f"Up to ₹{REGIMES['new']['rebate_max']:,} (new regime) or ₹{REGIMES['old']['rebate_max']:,} (old)"
     }
 }
 
+@st.cache_resource
+def get_rule_engine():
+    return RuleEngine()
+
+
 # Configure Gemini
 load_dotenv()
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -127,17 +111,14 @@ with st.form("tax_info"):
         health_insurance = st.number_input("🩺 Health Insurance Premium (₹)",
                                            min_value=0,
                                            help="Include premiums for self, family, and parents")
+        budget = st.number_input("💼 Extra Amount You Can Invest (₹)",
+                                 min_value=0,
+                                 help="Money you could still put into 80C/80D this year")
     with col3:
         hra_claimed = st.checkbox("✅ Already claiming HRA",
                                   help="Check if you're already receiving HRA benefits")
         st.markdown("### Tax Slabs (FY 2023-24)")
-        st.markdown("""
-        - ₹0-3L: 0%  
-        - ₹3-6L: 5%  
-        - ₹6-9L: 10%  
-        - ₹9-12L: 15%  
-        - Above ₹12L: 30%
-        """)
+        st.markdown(slab_markdown("new"))
 
     submitted = st.form_submit_button("🚀 Optimize My Taxes", use_container_width=True)
 
@@ -150,12 +131,30 @@ if submitted:
         "health_insurance": health_insurance
     }
 
-    # Generate suggestions
-    suggestions = []
-    for section, rule in TAX_RULES.items():
-        if rule["condition"](user_data):
-            suggestion_text = rule["suggestion"](user_data)
-            suggestions.append((section, suggestion_text, rule['limit']))
+    # Generate suggestions (the same compiled rules the batch jobs use)
+    suggestions = get_rule_engine().suggestions(user_data)
+
+    # Tax under both regimes
+    comparison = compare_regimes(user_data).iloc[0]
+    best_regime = comparison["best_regime"]
+    regime_cols = st.columns(len(REGIME_TABLE) + 1)
+    for col, (name, regime) in zip(regime_cols, REGIME_TABLE.items()):
+        col.metric(f"🧾 {regime.label}", f"₹{comparison[name]:,.0f}")
+    regime_cols[-1].metric("💰 Saving with the " + REGIME_TABLE[best_regime].label.lower(),
+                           f"₹{comparison['saving']:,.0f}")
+
+    # Best ways to use the extra budget
+    options = optimize(user_data, budget)
+    if options and options[0]["saving"] > 0:
+        st.markdown("### 🧮 Best Ways to Use Your Budget")
+        st.dataframe(pd.DataFrame([{
+            "Regime": REGIME_TABLE[o["regime"]].label,
+            "Extra 80C (₹)": f"{o['extra_80c']:,.0f}",
+            "Extra 80D (₹)": f"{o['extra_80d']:,.0f}",
+            "Claim HRA": "✅" if o["claim_hra"] else "",
+            "Tax (₹)": f"{o['tax']:,.0f}",
+            "You Save (₹)": f"{o['saving']:,.0f}",
+        } for o in options]), hide_index=True, use_container_width=True)
 
     # Visualization Section
     if suggestions:
@@ -172,11 +171,7 @@ if submitted:
                 """, unsafe_allow_html=True)
 
         with cols[1]:
-            tax_data = pd.DataFrame({
-                "Category": ["80C Investments", "Health Insurance", "HRA", "Remaining Taxable"],
-                "Amount": [investment_80c, health_insurance, rent_paid,
-                           income - (investment_80c + health_insurance + rent_paid)]
-            })
+            tax_data = tax_breakdown(user_data, best_regime)
             fig = px.pie(tax_data, names="Category", values="Amount",
                          title="📊 Current Tax Breakdown",
                          color_discrete_sequence=px.colors.sequential.RdBu)
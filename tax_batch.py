@@ -0,0 +1,169 @@
+"""Tax suggestions and liability for a whole file of taxpayers.
+
+    python tax_batch.py employees.csv results.parquet --chunk-size 50000 --workers 8
+
+Reads CSV or Parquet in chunks, runs the tax1 rules and both regimes'
+tax over each chunk on a process pool, and appends results to the output
+in input order as chunks finish. At most a few chunks per worker are in
+memory at once, however large the file.
+"""
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from tax_rules import RuleEngine
+from tax_calc import compare_regimes
+
+TAX_BATCH_CHUNK_SIZE = int(os.getenv("TAX_BATCH_CHUNK_SIZE", "50000"))
+TAX_BATCH_WORKERS = int(os.getenv("TAX_BATCH_WORKERS", str(os.cpu_count() or 1)))
+
+# Columns the rules and calculator use, and the value when a file lacks one
+INPUT_DEFAULTS = {
+    "taxable_income": None,
+    "rent_paid": 0,
+    "hra_claimed": False,
+    "investment_80c": 0,
+    "health_insurance": 0,
+}
+
+# Spellings of hra_claimed read as true; anything else, blanks included, is false
+TRUE_VALUES = {"true", "t", "yes", "y", "1", "1.0"}
+
+_engine = None
+
+
+def parse_bool(column):
+    """Booleans from a column of bools, numbers or strings like "yes"/"no"/"False"/"0" """
+    if column.dtype == bool:
+        return column
+    return column.map(lambda value: str(value).strip().lower() in TRUE_VALUES if pd.notna(value) else False)
+
+
+def process_chunk(chunk):
+    """Suggestion codes and regime comparison for one chunk of records.
+
+    Rows with a missing or non-numeric taxable_income are passed through
+    with an error quoting the original cell instead of results, so one bad
+    cell cannot stop the run.
+    """
+    global _engine
+    if _engine is None:
+        _engine = RuleEngine()
+    for column, default in INPUT_DEFAULTS.items():
+        if column not in chunk:
+            if default is None:
+                raise ValueError(f"Input has no {column} column")
+            chunk[column] = default
+    raw_income = chunk["taxable_income"]
+    for column in ("taxable_income", "rent_paid", "investment_80c", "health_insurance"):
+        chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+    chunk = chunk.fillna({column: default for column, default in INPUT_DEFAULTS.items()
+                          if default is not None and column != "hra_claimed"})
+    chunk["hra_claimed"] = parse_bool(chunk["hra_claimed"])
+
+    valid = chunk["taxable_income"].notna()
+    result = chunk.assign(suggestions="", tax_new=float("nan"), tax_old=float("nan"), best_regime="",
+                          regime_saving=float("nan"), error="")
+    # Coercion has replaced the bad cell with NaN, so quote the original
+    result.loc[~valid, "error"] = [f"non-numeric taxable_income: {value!r}" if pd.notna(value)
+                                   else "missing taxable_income" for value in raw_income[~valid]]
+    if valid.any():
+        rows = chunk[valid]
+        comparison = compare_regimes(rows)
+        result.loc[valid, "suggestions"] = _engine.suggestion_codes(rows)
+        result.loc[valid, "tax_new"] = comparison["new"].round(2)
+        result.loc[valid, "tax_old"] = comparison["old"].round(2)
+        result.loc[valid, "best_regime"] = comparison["best_regime"]
+        result.loc[valid, "regime_saving"] = comparison["saving"].round(2)
+    return result
+
+
+def read_chunks(path, chunk_size):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ResultWriter:
+    """Appends result chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        self._header = True
+
+    def write(self, frame):
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            frame.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def run(input_path, output_path, chunk_size=TAX_BATCH_CHUNK_SIZE, workers=TAX_BATCH_WORKERS,
+        log=sys.stderr):
+    """Process `input_path` into `output_path`; returns (rows, seconds)"""
+    writer = ResultWriter(output_path)
+    started = time.perf_counter()
+    rows = chunks = 0
+
+    def report(result):
+        nonlocal rows, chunks
+        writer.write(result)
+        rows += len(result)
+        chunks += 1
+        elapsed = time.perf_counter() - started
+        print(f"\r{chunks} chunks, {rows:,} rows, {elapsed:.1f} s, {rows / elapsed:,.0f} rows/s",
+              end="", file=log, flush=True)
+
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                report(process_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Bounded read-ahead keeps memory flat; results are written
+                # in input order as the oldest chunk finishes
+                pending = deque()
+                for chunk in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(process_chunk, chunk))
+                    if len(pending) >= workers * 2:
+                        report(pending.popleft().result())
+                while pending:
+                    report(pending.popleft().result())
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+    print(file=log)
+    return rows, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tax suggestions and liability for a CSV or Parquet file")
+    parser.add_argument("input", help="taxpayer records (.csv or .parquet)")
+    parser.add_argument("output", help="where to write results (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=TAX_BATCH_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=TAX_BATCH_WORKERS)
+    args = parser.parse_args(argv)
+
+    rows, elapsed = run(args.input, args.output, args.chunk_size, args.workers)
+    print(f"Processed {rows:,} rows in {elapsed:.2f} s ({rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
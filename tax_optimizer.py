@@ -0,0 +1,169 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from tax_calc import REGIME_TABLE, LIMIT_80C, LIMIT_80D, compare_regimes, deduction_amounts, hra_exemption
+
+# Extra 80C/80D amounts are tried in steps of this many rupees
+OPTIMIZER_STEP = int(os.getenv("TAX_OPTIMIZER_STEP", "5000"))
+OPTIMIZER_TOP_K = int(os.getenv("TAX_OPTIMIZER_TOP_K", "3"))
+# Most (regime, taxable income) results remembered across users
+OPTIMIZER_MEMO_SIZE = int(os.getenv("TAX_OPTIMIZER_MEMO_SIZE", "200000"))
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _taxes(regime, taxable_incomes):
+    """Total tax for each taxable income, computed once per (regime, income).
+
+    Tax depends on nothing but the regime and taxable income, so different
+    allocations, and different users, that land on the same taxable income
+    share one result.
+    """
+    with _memo_lock:
+        known = {t: _memo[(regime, t)] for t in set(taxable_incomes) if (regime, t) in _memo}
+    missing = sorted(set(taxable_incomes) - known.keys())
+    if missing:
+        totals = REGIME_TABLE[regime].tax(np.array(missing, dtype=float))["total_tax"]
+        known.update(zip(missing, totals.tolist()))
+        with _memo_lock:
+            if len(_memo) + len(missing) > OPTIMIZER_MEMO_SIZE:
+                _memo.clear()
+            _memo.update({(regime, t): known[t] for t in missing})
+    return [known[t] for t in taxable_incomes]
+
+
+def _steps(room, step):
+    room = max(int(room), 0)
+    return sorted(set(range(0, room, step)) | {room})
+
+
+def optimize(data, budget, step=OPTIMIZER_STEP, top_k=OPTIMIZER_TOP_K):
+    """The `top_k` cheapest ways to use up to `budget` rupees on deductions.
+
+    `data` is one tax1 form row. Each option picks a regime, extra 80C and
+    80D amounts within their limits and the budget, and whether to start
+    claiming HRA. Options are ranked by tax, then by money spent, and an
+    option that costs more than another in its regime without lowering the
+    tax is left out.
+    """
+    income = float(data["taxable_income"])
+    current = compare_regimes(data).iloc[0]
+    current_tax = float(current[current["best_regime"]])
+    sec_80c, sec_80d, hra = deduction_amounts({k: np.atleast_1d(np.asarray(v)) for k, v in data.items()})[:, 0]
+    standard = min(income, REGIME_TABLE["old"].standard_deduction)
+
+    hra_choices = [False]
+    if data["rent_paid"] > 0 and not data.get("hra_claimed", False):
+        hra_choices.append(True)
+
+    # The new regime ignores these deductions, so spending never helps there
+    options = [{"regime": "new", "extra_80c": 0, "extra_80d": 0, "claim_hra": False,
+                "tax": _taxes("new", [max(income - min(income, REGIME_TABLE["new"].standard_deduction), 0)])[0]}]
+
+    room_80c = min(LIMIT_80C - sec_80c, budget)
+    for claim_hra in hra_choices:
+        fixed = standard + sec_80c + sec_80d + (float(hra_exemption(income, data["rent_paid"])) if claim_hra else hra)
+        candidates = []
+        for extra_80c in _steps(room_80c, step):
+            room_80d = min(LIMIT_80D - sec_80d, budget - extra_80c)
+            for extra_80d in _steps(room_80d, step):
+                taxable = max(income - fixed - extra_80c - extra_80d, 0)
+                candidates.append((extra_80c, extra_80d, taxable))
+                if taxable == 0:
+                    # Nothing left to tax; spending more cannot help
+                    break
+        taxes = _taxes("old", [taxable for _, _, taxable in candidates])
+        options += [{"regime": "old", "extra_80c": extra_80c, "extra_80d": extra_80d, "claim_hra": claim_hra,
+                     "tax": tax} for (extra_80c, extra_80d, _), tax in zip(candidates, taxes)]
+
+    for option in options:
+        option["spend"] = option["extra_80c"] + option["extra_80d"]
+        option["saving"] = current_tax - option["tax"]
+    options.sort(key=lambda o: (round(o["tax"], 2), o["spend"], o["claim_hra"]))
+
+    best = []
+    for option in options:
+        # Skip options dominated by one already chosen in the same regime:
+        # no less tax for no less money
+        if any(o["regime"] == option["regime"] and o["tax"] <= option["tax"] + 0.005
+               and o["spend"] <= option["spend"] for o in best):
+            continue
+        best.append(option)
+        if len(best) == top_k:
+            break
+    return best
+
+
+def optimize_batch(frame, budget, step=OPTIMIZER_STEP):
+    """Best option for every row of `frame`, vectorized over rows.
+
+    Tax under the old regime depends only on the total deduction, so each
+    row is priced at every total extra amount on the step grid at once;
+    80C room is filled before 80D. `budget` is a number or a column.
+    """
+    columns = {name: frame[name].to_numpy() for name in frame.columns}
+    income = columns["taxable_income"].astype(float)
+    budget = np.broadcast_to(np.asarray(budget, dtype=float), income.shape)
+    sec_80c, sec_80d, hra = deduction_amounts(columns)
+    claimable_hra = hra_exemption(income, columns["rent_paid"])
+    current = compare_regimes(frame)
+
+    room = np.minimum(LIMIT_80C - sec_80c + LIMIT_80D - sec_80d, budget)
+    extras = np.arange(0, LIMIT_80C + LIMIT_80D + step, step, dtype=float)
+    spend = np.minimum(extras[None, :], room[:, None])
+    standard = np.minimum(income, REGIME_TABLE["old"].standard_deduction)
+    fixed = (standard + sec_80c + sec_80d + np.maximum(hra, claimable_hra))[:, None]
+    taxable = np.maximum(income[:, None] - fixed - spend, 0)
+    old_tax = REGIME_TABLE["old"].tax(taxable.ravel())["total_tax"].reshape(taxable.shape)
+
+    # Cheapest spend that reaches the lowest old-regime tax for the row
+    lowest = old_tax.min(axis=1)
+    pick = np.argmax(old_tax <= lowest[:, None] + 0.005, axis=1)
+    old_spend = spend[np.arange(len(spend)), pick]
+    new_tax = current["new"].to_numpy()
+    use_old = lowest < new_tax
+
+    extra_80c = np.where(use_old, np.minimum(old_spend, LIMIT_80C - sec_80c), 0)
+    current_tax = current[["new", "old"]].min(axis=1).to_numpy()
+    best_tax = np.where(use_old, lowest, new_tax)
+    return pd.DataFrame({
+        "regime": np.where(use_old, "old", "new"),
+        "extra_80c": extra_80c,
+        "extra_80d": np.where(use_old, old_spend, 0) - extra_80c,
+        "claim_hra": use_old & (claimable_hra > hra),
+        "tax": best_tax,
+        "saving": current_tax - best_tax,
+    }, index=frame.index)
+
+
+if __name__ == "__main__":
+    # Latency per interactive call (target under 50 ms) and batch throughput
+    import time
+
+    user = {"taxable_income": 1_400_000, "rent_paid": 240_000, "hra_claimed": False,
+            "investment_80c": 50_000, "health_insurance": 0}
+    best = float("inf")
+    for i in range(20):
+        _memo.clear()
+        started = time.perf_counter()
+        options = optimize(user, budget=200_000)
+        best = min(best, time.perf_counter() - started)
+    print(f"optimize, cold memo: {best * 1000:.1f} ms")
+    for option in options:
+        print(f"  {option}")
+
+    rng = np.random.default_rng(0)
+    n = 100_000
+    frame = pd.DataFrame({
+        "taxable_income": rng.integers(300_000, 5_000_000, n),
+        "rent_paid": rng.choice([0, 120_000, 360_000], n),
+        "hra_claimed": rng.random(n) < 0.5,
+        "investment_80c": rng.choice([0, 50_000, 150_000], n),
+        "health_insurance": rng.choice([0, 25_000], n),
+    })
+    started = time.perf_counter()
+    result = optimize_batch(frame, budget=100_000)
+    elapsed = time.perf_counter() - started
+    print(f"optimize_batch: {n:,} rows in {elapsed:.2f} s ({n / elapsed:,.0f} rows/s)")
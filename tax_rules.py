@@ -0,0 +1,139 @@
+import operator
+import numpy as np
+import pandas as pd
+from tax_calc import REGIMES
+
+LIMIT_80C = 150000
+# The 87A rule follows the new (default) regime's rebate in tax_calc
+REBATE_REGIME = REGIMES["new"]
+
+# Tax-saving suggestions as data. A rule fires when every (column, op,
+# value) clause in "when" holds; "derive" adds computed columns that
+# clauses and the suggestion template can refer to by name.
+TAX_RULES = [
+    {
+        "code": "HRA",
+        "when": [("rent_paid", ">", 0), ("hra_claimed", "==", False)],
+        "suggestion": "Claim HRA exemption using rent receipts",
+        "limit": "Actual HRA received, rent paid minus 10% of salary, or 50%/40%/30% of salary (metro/non-metro)"
+    },
+    {
+        "code": "80C",
+        "derive": [("shortfall_80c", LIMIT_80C, "-", "investment_80c")],
+        "when": [("investment_80c", "<", LIMIT_80C)],
+        "suggestion": "Invest ₹{shortfall_80c} more in LIC/PPF/ELSS for full 80C benefit",
+        "limit": "₹1.5 lakh"
+    },
+    {
+        "code": "80D",
+        "when": [("health_insurance", "==", 0)],
+        "suggestion": "Buy health insurance to claim up to ₹25,000 deduction",
+        "limit": "₹25,000 (₹50,000 for seniors)"
+    },
+    {
+        "code": "87A",
+        "derive": [("taxable_new", "taxable_income", "-", REBATE_REGIME["standard_deduction"])],
+        "when": [("taxable_new", "<=", REBATE_REGIME["rebate_limit"])],
+        "suggestion": f"You qualify for Section 87A rebate in the new regime - up to "
+                      f"₹{REBATE_REGIME['rebate_max']:,} tax relief, so no tax to pay!",
+        "limit": f"Taxable income ≤ ₹{REBATE_REGIME['rebate_limit'] / 1e5:g}L after the standard deduction"
+    },
+]
+
+OPS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+    "==": operator.eq, "!=": operator.ne,
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+}
+
+
+def _operand(value, columns):
+    # Strings name a column, anything else is a constant
+    return columns[value] if isinstance(value, str) else value
+
+
+class RuleEngine:
+    """Evaluates TAX_RULES over a whole batch of taxpayers at once.
+
+    Rules are checked and turned into lists of (op, operand) steps once;
+    `evaluate` then runs each clause as one NumPy comparison over every
+    row. Input is a DataFrame or a dict of equal-length arrays or scalars,
+    so a single form submission is just a batch of one.
+    """
+
+    def __init__(self, rules=TAX_RULES):
+        self.rules = rules
+        self.codes = [rule["code"] for rule in rules]
+        self._derived = []
+        self._clauses = []
+        for rule in rules:
+            for name, left, op, right in rule.get("derive", []):
+                self._derived.append((name, left, OPS[op], right))
+            self._clauses.append([(column, OPS[op], value) for column, op, value in rule["when"]])
+
+    def _columns(self, data):
+        if isinstance(data, pd.DataFrame):
+            columns = {name: data[name].to_numpy() for name in data.columns}
+        else:
+            columns = {name: np.atleast_1d(np.asarray(value)) for name, value in data.items()}
+        for name, left, op, right in self._derived:
+            columns[name] = op(_operand(left, columns), _operand(right, columns))
+        return columns
+
+    def evaluate(self, data):
+        """Boolean matrix with a row per taxpayer and a column per rule"""
+        columns = self._columns(data)
+        rows = len(next(iter(columns.values())))
+        fired = np.ones((rows, len(self.rules)), dtype=bool)
+        for i, clauses in enumerate(self._clauses):
+            for column, op, value in clauses:
+                fired[:, i] &= op(columns[column], _operand(value, columns))
+        return fired
+
+    def suggestion_codes(self, data, sep=","):
+        """The codes of the rules that fire for each row, e.g. "HRA,80C" """
+        fired = self.evaluate(data)
+        joined = np.full(len(fired), "", dtype=object)
+        for i, code in enumerate(self.codes):
+            joined[fired[:, i]] += code + sep
+        return pd.Series(joined, index=data.index if isinstance(data, pd.DataFrame) else None,
+                         dtype=object).str.rstrip(sep)
+
+    def suggestions(self, row):
+        """(code, suggestion, limit) for every rule that fires for one taxpayer"""
+        columns = self._columns(row)
+        fired = self.evaluate(row)[0]
+        values = {name: value[0].item() if hasattr(value[0], "item") else value[0]
+                  for name, value in columns.items()}
+        return [(rule["code"], rule["suggestion"].format(**values), rule["limit"])
+                for rule, hit in zip(self.rules, fired) if hit]
+
+
+if __name__ == "__main__":
+    # Rows per second: one vectorized pass against evaluating row by row
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 100_000
+    frame = pd.DataFrame({
+        "taxable_income": rng.integers(200_000, 3_000_000, n),
+        "rent_paid": rng.choice([0, 120_000, 240_000], n),
+        "hra_claimed": rng.random(n) < 0.5,
+        "investment_80c": rng.choice([0, 50_000, 150_000], n),
+        "health_insurance": rng.choice([0, 25_000], n),
+    })
+    engine = RuleEngine()
+
+    started = time.perf_counter()
+    codes = engine.suggestion_codes(frame)
+    vectorized = time.perf_counter() - started
+
+    sample = frame.head(5_000).to_dict("records")
+    started = time.perf_counter()
+    for row in sample:
+        engine.suggestions(row)
+    per_row = (time.perf_counter() - started) / len(sample) * n
+
+    print(f"vectorized: {n / vectorized:12,.0f} rows/s")
+    print(f"row by row: {n / per_row:12,.0f} rows/s")
+    print(codes.value_counts().head())
@@ -0,0 +1,88 @@
+import time
+from datetime import datetime
+import mongomock
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+import mongo
+
+
+@pytest.fixture(autouse=True)
+def client():
+    client = mongomock.MongoClient()
+    mongo.set_client(client)
+    yield client
+    mongo.set_client(None)
+
+
+def test_find_finance_returns_saved_profile():
+    mongo.save_finance("alice", income=100000.0, expenses=40000.0)
+    assert mongo.find_finance("alice") == {"name": "alice", "income": 100000.0, "expenses": 40000.0}
+
+
+def test_find_finance_unknown_name():
+    assert mongo.find_finance("nobody") is None
+
+
+def test_save_finance_updates_in_place():
+    mongo.save_finance("alice", income=100000.0, expenses=40000.0)
+    mongo.save_finance("alice", income=120000.0, expenses=45000.0)
+    assert mongo.finance_collection().count_documents({"name": "alice"}) == 1
+    assert mongo.find_finance("alice")["income"] == 120000.0
+
+
+def test_save_plan_keeps_versions_behind_the_latest_pointer():
+    assert mongo.save_plan("alice", "House", 5e6, 10, 6.7e6, 40000.0, "first plan") == 1
+    assert mongo.save_plan("alice", "Car", 1e6, 3, 1.1e6, 30000.0, "second plan") == 2
+
+    current = mongo.current_plan("alice")
+    assert (current["goal"], current["latest_version"], current["plan"]) == ("Car", 2, "second plan")
+    assert mongo.plans_collection().count_documents({"name": "alice"}) == 1
+
+    history = mongo.plan_history("alice")
+    assert [version["version"] for version in history] == [2, 1]
+    assert all("plan_z" not in version for version in history)
+    assert mongo.plan_history("alice", before=2)[0]["goal"] == "House"
+    assert mongo.get_plan_version("alice", 1)["plan"] == "first plan"
+
+
+def test_latest_pointer_is_replaced_not_merged():
+    mongo.save_plan_version(mongo.plans_collection(), mongo.plan_versions_collection(), "alice",
+                            {"goal_description": "Car", "goal_amount": 1e6}, "other schema")
+    mongo.save_plan("alice", "House", 5e6, 10, 6.7e6, 40000.0, "plan")
+    current = mongo.current_plan("alice")
+    assert current["goal"] == "House"
+    assert "goal_description" not in current and "goal_amount" not in current
+
+
+def test_plan_saved_before_versioning_is_kept_in_history():
+    mongo.plans_collection().insert_one({"name": "alice", "goal": "House", "amount": 5e6,
+                                         "plan": "legacy plan text", "created_at": datetime(2024, 1, 1)})
+    assert mongo.save_plan("alice", "Car", 1e6, 3, 1.1e6, 30000.0, "new plan") == 2
+
+    assert [version["version"] for version in mongo.plan_history("alice")] == [2, 1]
+    legacy = mongo.get_plan_version("alice", 1)
+    assert (legacy["plan"], legacy["goal"], legacy["created_at"]) == ("legacy plan text", "House",
+                                                                     datetime(2024, 1, 1))
+    assert mongo.current_plan("alice")["plan"] == "new plan"
+
+
+def test_ensure_indexes_creates_unique_name_indexes(client):
+    mongo.ensure_indexes()
+    indexes = mongo.finance_collection().index_information()
+    assert any(index["key"] == [("name", 1)] and index.get("unique") for index in indexes.values())
+
+
+def test_ensure_indexes_fails_fast_while_the_server_is_down(client):
+    mongo.set_client(MongoClient("mongodb://127.0.0.1:1", serverSelectionTimeoutMS=300))
+    with pytest.raises(PyMongoError):
+        mongo.ensure_indexes()
+    # The remembered failure is raised again without waiting for the server
+    started = time.perf_counter()
+    with pytest.raises(PyMongoError):
+        mongo.ensure_indexes()
+    assert time.perf_counter() - started < 0.1
+
+    mongo.set_client(client)
+    mongo.ensure_indexes()
+    assert mongo.DB_NAME in mongo._indexed
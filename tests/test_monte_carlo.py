@@ -0,0 +1,17 @@
+import pytest
+from monte_carlo import simulate, simulate_plan
+
+
+@pytest.mark.parametrize("timeframe", [0, -1])
+def test_timeframe_under_a_year_is_rejected(timeframe):
+    with pytest.raises(ValueError):
+        simulate(1e6, timeframe, 10000, paths=100, seed=0)
+    with pytest.raises(ValueError):
+        simulate_plan({"goal_amount": 1e6, "timeframe": timeframe, "income": 1e5, "expenses": 5e4})
+
+
+def test_saving_more_raises_the_chance_of_success():
+    low = simulate(1e6, 5, 10000, paths=2000, seed=0)
+    high = simulate(1e6, 5, 20000, paths=2000, seed=0)
+    assert 0 <= low["success_probability"] < high["success_probability"] <= 1
+    assert list(low["years"]) == [1, 2, 3, 4, 5]
@@ -0,0 +1,139 @@
+import time
+import asyncio
+import threading
+import pytest
+from aiohttp import web
+from news import NewsFetcher, NewsError
+from ttl_cache import TTLCache, MemoryBackend
+
+
+class StubServer:
+    """A local aiohttp app standing in for NewsAPI and news sites"""
+
+    def __init__(self):
+        self.calls = {}
+        self.fail_first = 0
+        self.delay = 0.0
+        self.active = 0
+        self.max_active = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.url = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(5)
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/v2/everything", self.everything)
+        app.router.add_get("/article/{n}", self.article)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return self.calls[name]
+
+    async def everything(self, request):
+        if self._count("everything") <= self.fail_first:
+            return web.Response(status=503, text="busy")
+        await asyncio.sleep(self.delay)
+        return web.json_response({"articles": [{"title": request.query["q"]}]})
+
+    async def article(self, request):
+        self._count("article")
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return web.Response(text=f"<html><p>Article {request.match_info['n']}</p></html>",
+                            content_type="text/html")
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def make_fetcher(server, **options):
+    options.setdefault("timeout", 2)
+    return NewsFetcher(api_key="test", api_url=server.url + "/v2/everything",
+                       cache=TTLCache(60, MemoryBackend()), **options)
+
+
+def test_get_news_retries_server_errors(server):
+    server.fail_first = 2
+    fetcher = make_fetcher(server, retries=2)
+    try:
+        assert fetcher.get_news("INFY") == [{"title": "INFY"}]
+        assert server.calls["everything"] == 3
+    finally:
+        fetcher.close()
+
+
+def test_get_news_gives_up_after_retries(server):
+    server.fail_first = 10
+    fetcher = make_fetcher(server, retries=1)
+    try:
+        with pytest.raises(NewsError, match="503"):
+            fetcher.get_news("INFY")
+        assert server.calls["everything"] == 2
+    finally:
+        fetcher.close()
+
+
+def test_get_news_is_cached(server):
+    fetcher = make_fetcher(server)
+    try:
+        fetcher.get_news("TCS")
+        fetcher.get_news("TCS")
+        assert server.calls["everything"] == 1
+    finally:
+        fetcher.close()
+
+
+def test_request_timeout_raises_news_error(server):
+    server.delay = 1.0
+    fetcher = make_fetcher(server, timeout=0.2, retries=0)
+    try:
+        started = time.perf_counter()
+        with pytest.raises(NewsError):
+            fetcher.get_news("INFY")
+        assert time.perf_counter() - started < 1.0
+    finally:
+        fetcher.close()
+
+
+def test_articles_are_scraped_concurrently_within_the_host_limit(server):
+    server.delay = 0.3
+    fetcher = make_fetcher(server, max_per_host=4)
+    urls = [f"{server.url}/article/{n}" for n in range(8)]
+    try:
+        started = time.perf_counter()
+        texts = fetcher.scrape_articles(urls)
+        elapsed = time.perf_counter() - started
+    finally:
+        fetcher.close()
+    assert [text.strip() for text in texts] == [f"Article {n}" for n in range(8)]
+    assert server.max_active == 4
+    # Two rounds of four, not eight requests one after another
+    assert elapsed < 8 * server.delay * 0.75
+
+
+def test_failed_article_comes_back_as_error(server):
+    fetcher = make_fetcher(server, retries=0)
+    try:
+        texts = fetcher.scrape_articles([f"{server.url}/article/1", f"{server.url}/missing"])
+    finally:
+        fetcher.close()
+    assert texts[0].strip() == "Article 1"
+    assert isinstance(texts[1], NewsError)
@@ -0,0 +1,15 @@
+import os
+import warnings
+import pytest
+from pdf_report import PDFRenderer, PDF_FONT_PATH
+
+FONT = next((path for path in (PDF_FONT_PATH, "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+             if os.path.exists(path)), None)
+
+
+@pytest.mark.skipif(FONT is None, reason="DejaVuSans.ttf not available")
+def test_plans_with_different_characters_all_render():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    renderer = PDFRenderer(FONT)
+    for name in ("Alice", "Bob", "Zoë"):
+        assert renderer.render({"name": name, "financial_plan": f"Plan for {name}"}).startswith(b"%PDF")
@@ -0,0 +1,111 @@
+import time
+import threading
+import fakeredis
+import pytest
+from plan_jobs import PlanJobQueue, MemoryJobStore, RedisJobStore, PENDING, RUNNING, DONE, FAILED
+
+PROFILE = {"name": "Sam", "income": 100000.0, "expenses": 40000.0, "goal_description": "Buy a house",
+           "goal_amount": 5000000.0, "timeframe": 10}
+
+
+class FakeGenerator:
+    """Streams a fixed plan, failing on the first `failures` calls"""
+
+    def __init__(self, chunks=("Plan ", "for ", "Sam."), failures=0, gate=None):
+        self.chunks = chunks
+        self.failures = failures
+        self.gate = gate
+        self.calls = 0
+
+    def stream(self, profile):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.calls <= self.failures:
+            raise RuntimeError("model unavailable")
+        yield from self.chunks
+
+
+def memory_store(ttl):
+    return MemoryJobStore(ttl=ttl)
+
+
+def redis_bytes_store(ttl):
+    return RedisJobStore(fakeredis.FakeRedis(), ttl=ttl)
+
+
+def redis_str_store(ttl):
+    return RedisJobStore(fakeredis.FakeRedis(decode_responses=True), ttl=ttl)
+
+
+STORES = pytest.mark.parametrize("make_store", [memory_store, redis_bytes_store, redis_str_store])
+
+
+@STORES
+def test_job_streams_to_done(make_store):
+    queue = PlanJobQueue(FakeGenerator(), store=make_store(60))
+    seen = []
+    job = queue.wait(queue.submit("s1", PROFILE), poll_interval=0.01, on_progress=seen.append)
+    assert job == {"status": DONE, "text": "Plan for Sam.", "error": ""}
+    assert seen[-1] == "Plan for Sam."
+
+
+@STORES
+def test_same_inputs_share_one_job(make_store):
+    gate = threading.Event()
+    generator = FakeGenerator(gate=gate)
+    queue = PlanJobQueue(generator, store=make_store(60))
+    first = queue.submit("s1", PROFILE)
+    assert queue.submit("s1", dict(PROFILE)) == first
+    assert queue.submit("s2", PROFILE) != first
+    gate.set()
+    queue.wait(first, poll_interval=0.01)
+    # A finished job is still deduplicated until it expires
+    assert queue.submit("s1", PROFILE) == first
+    assert queue.wait(first, poll_interval=0.01)["status"] == DONE
+    assert generator.calls == 2
+
+
+@STORES
+def test_failed_job_is_retried(make_store):
+    generator = FakeGenerator(failures=1)
+    queue = PlanJobQueue(generator, store=make_store(60))
+    job_id = queue.submit("s1", PROFILE)
+    job = queue.wait(job_id, poll_interval=0.01)
+    assert job["status"] == FAILED and job["error"] == "model unavailable"
+
+    assert queue.submit("s1", PROFILE) == job_id
+    job = queue.wait(job_id, poll_interval=0.01)
+    assert job == {"status": DONE, "text": "Plan for Sam.", "error": ""}
+    assert generator.calls == 2
+
+
+@STORES
+def test_finished_jobs_expire(make_store):
+    generator = FakeGenerator()
+    queue = PlanJobQueue(generator, store=make_store(1))
+    job_id = queue.submit("s1", PROFILE)
+    assert queue.wait(job_id, poll_interval=0.01)["status"] == DONE
+    time.sleep(1.1)
+    # Memory prunes on the next create, Redis expires the keys itself
+    assert queue.submit("s1", PROFILE) == job_id
+    assert queue.wait(job_id, poll_interval=0.01)["status"] == DONE
+    assert generator.calls == 2
+
+
+def test_expired_job_reports_failure():
+    queue = PlanJobQueue(FakeGenerator(), store=MemoryJobStore())
+    job = queue.wait("missing", poll_interval=0.01)
+    assert job["status"] == FAILED and job["error"] == "Job expired"
+
+
+def test_wait_times_out():
+    gate = threading.Event()
+    queue = PlanJobQueue(FakeGenerator(gate=gate), store=MemoryJobStore())
+    job_id = queue.submit("s1", PROFILE)
+    started = time.monotonic()
+    job = queue.wait(job_id, poll_interval=0.01, timeout=0.1)
+    assert job["status"] == FAILED and "Timed out" in job["error"]
+    assert time.monotonic() - started < 1
+    assert queue.get(job_id)["status"] in (PENDING, RUNNING)
+    gate.set()
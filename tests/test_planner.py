@@ -0,0 +1,101 @@
+import pytest
+from planner import PlanGenerator, NAME_PLACEHOLDER
+from ttl_cache import TTLCache, MemoryBackend
+
+PROFILE = {"name": "Sam", "income": 100000.0, "expenses": 40000.0, "goal_description": "Buy a house",
+           "goal_amount": 5000000.0, "timeframe": 10}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for the Gemini model, recording every prompt it is sent"""
+
+    def __init__(self, text="Plan for Sam."):
+        self.text = text
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        return FakeResponse(self.text)
+
+
+class FakeStreamingModel(FakeModel):
+    """Yields the plan in chunks when asked to stream, optionally failing midway"""
+
+    def __init__(self, chunks, fail_after=None):
+        super().__init__("".join(chunks))
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    def generate_content(self, prompt, stream=False):
+        if not stream:
+            return super().generate_content(prompt)
+        self.prompts.append(prompt)
+        return self._stream()
+
+    def _stream(self):
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield FakeResponse(chunk)
+
+
+def make_generator(model, **options):
+    return PlanGenerator(model, cache=TTLCache(60, MemoryBackend()), **options)
+
+
+def test_same_profile_is_served_from_cache():
+    model = FakeModel()
+    generator = make_generator(model)
+    assert generator.generate(PROFILE) == "Plan for Sam."
+    assert generator.generate(dict(PROFILE)) == "Plan for Sam."
+    assert len(model.prompts) == 1
+
+
+def test_different_profile_calls_the_model():
+    model = FakeModel()
+    generator = make_generator(model)
+    generator.generate(PROFILE)
+    generator.generate({**PROFILE, "goal_amount": 6000000.0})
+    assert len(model.prompts) == 2
+
+
+def test_bucketed_amounts_share_a_plan():
+    model = FakeModel()
+    generator = make_generator(model, bucket=1000)
+    generator.generate(PROFILE)
+    generator.generate({**PROFILE, "income": 100200.0})
+    assert len(model.prompts) == 1
+
+
+def test_shared_plan_swaps_whole_names_only():
+    model = FakeModel("Dear Sam, Sam's plan mentions Samantha.")
+    generator = make_generator(model, ignore_name=True)
+    assert generator.generate(PROFILE) == "Dear Sam, Sam's plan mentions Samantha."
+    assert generator.generate({**PROFILE, "name": "Bob"}) == "Dear Bob, Bob's plan mentions Samantha."
+    assert len(model.prompts) == 1
+    assert "Sam" in model.prompts[0] and NAME_PLACEHOLDER not in model.prompts[0]
+
+
+def test_stream_yields_chunks_then_caches_the_whole_plan():
+    model = FakeStreamingModel(["Save ", "every ", "month."])
+    generator = make_generator(model)
+    assert list(generator.stream(PROFILE)) == ["Save ", "every ", "month."]
+    # The second request is answered from the cache in one chunk
+    assert list(generator.stream(PROFILE)) == ["Save every month."]
+    assert generator.generate(PROFILE) == "Save every month."
+    assert len(model.prompts) == 1
+
+
+def test_interrupted_stream_is_not_cached():
+    model = FakeStreamingModel(["Save ", "every ", "month."], fail_after=2)
+    generator = make_generator(model)
+    with pytest.raises(ConnectionError):
+        list(generator.stream(PROFILE))
+    model.fail_after = None
+    assert list(generator.stream(PROFILE)) == ["Save ", "every ", "month."]
+    assert len(model.prompts) == 2
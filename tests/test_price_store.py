@@ -0,0 +1,122 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from price_store import PriceStore, LocalProvider, _merge, _file_stem, _write_atomic, read_frame, write_frame
+
+
+class FailingProvider:
+    def history(self, ticker, period=None, start=None):
+        raise ConnectionError("provider down")
+
+
+def test_refresher_records_last_error(tmp_path, caplog):
+    store = PriceStore(FailingProvider(), str(tmp_path))
+    store.start_refresher(["INFY.NS"], interval=60)
+    deadline = time.monotonic() + 5
+    while not store.last_error and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.last_error == "provider down"
+    assert "Price refresh failed: provider down" in caplog.text
+
+
+def bars(start, periods, tz=None):
+    index = pd.bdate_range(start, periods=periods, tz=tz, name="Date")
+    close = np.arange(periods, dtype=float) + 100
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(periods, 1000)}, index=index)
+
+
+class RecordingProvider(LocalProvider):
+    """LocalProvider that remembers the arguments of every call"""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+
+    def history(self, ticker, period=None, start=None):
+        self.calls.append((ticker, period, start))
+        return super().history(ticker, period, start)
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    directory = tmp_path / "fixture"
+    directory.mkdir()
+    write_frame(bars("2024-01-01", 260, tz="Asia/Kolkata"), str(directory / _file_stem("M&M.BO")))
+    return directory
+
+
+def test_cold_fetch_downloads_period_and_persists(tmp_path, fixture_dir):
+    provider = RecordingProvider(str(fixture_dir))
+    store = PriceStore(provider, str(tmp_path / "cache"))
+    df = store.get("M&M.BO", period="6mo")
+
+    assert provider.calls == [("M&M.BO", "6mo", None)]
+    assert not df.empty and df.index[-1] == pd.Timestamp("2024-12-27", tz="Asia/Kolkata")
+    assert df.index[0] >= df.index[-1] - pd.DateOffset(months=6)
+    saved = read_frame(str(tmp_path / "cache" / "M_M.BO"))
+    pd.testing.assert_frame_equal(saved, df, check_freq=False)
+
+    # Fresh cache is served without asking the provider again
+    store.get("M&M.BO", period="6mo")
+    assert len(provider.calls) == 1
+
+
+def test_incremental_fetch_starts_at_last_stored_bar(tmp_path, fixture_dir):
+    full = read_frame(str(fixture_dir / "M_M.BO"))
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    stale = full.iloc[:-10].copy()
+    # The last stored bar was partial and must be replaced by the fetched one
+    stale.iloc[-1, stale.columns.get_loc("Close")] = -1.0
+    write_frame(stale, str(cache / "M_M.BO"))
+
+    provider = RecordingProvider(str(fixture_dir))
+    store = PriceStore(provider, str(cache), refresh_interval=0)
+    df = store.refresh("M&M.BO", period="6mo")
+
+    assert provider.calls == [("M&M.BO", None, stale.index[-1].strftime("%Y-%m-%d"))]
+    pd.testing.assert_frame_equal(df, full, check_freq=False)
+    pd.testing.assert_frame_equal(read_frame(str(cache / "M_M.BO")), full, check_freq=False)
+
+
+def test_merge_aligns_naive_bars_to_cached_tz():
+    cached = bars("2024-01-01", 10, tz="Asia/Kolkata")
+    new = bars("2024-01-12", 5)
+    new["Close"] += 50
+    merged = _merge(cached, new)
+
+    assert str(merged.index.tz) == "Asia/Kolkata"
+    assert merged.index.is_unique and merged.index.is_monotonic_increasing
+    assert len(merged) == 14
+    assert merged.loc[pd.Timestamp("2024-01-12", tz="Asia/Kolkata"), "Close"] == 150.0
+
+
+def test_merge_drops_tz_when_cache_is_naive():
+    merged = _merge(bars("2024-01-01", 10), bars("2024-01-12", 5, tz="Asia/Kolkata"))
+    assert merged.index.tz is None and len(merged) == 14
+
+
+def test_write_frame_round_trips(tmp_path):
+    df = bars("2024-01-01", 20, tz="Asia/Kolkata")
+    write_frame(df, str(tmp_path / "INFY.NS"))
+    pd.testing.assert_frame_equal(read_frame(str(tmp_path / "INFY.NS")), df, check_freq=False)
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "INFY.NS.pkl")
+    old = bars("2024-01-01", 20)
+    old.to_pickle(path)
+
+    def broken_write(tmp_file):
+        with open(tmp_file, "wb") as f:
+            f.write(b"half a frame")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        _write_atomic(broken_write, path)
+    pd.testing.assert_frame_equal(pd.read_pickle(path), old)
+    assert os.listdir(tmp_path) == ["INFY.NS.pkl"]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from projection import project, required_monthly_saving, scenario_grid
+
+
+def test_project_matches_the_closed_form_without_returns():
+    target, monthly = project(100000, 2, inflation=0.03, annual_return=0.0)
+    assert target == pytest.approx(100000 * 1.03 ** 2)
+    assert monthly == pytest.approx(target / 24)
+
+
+@pytest.mark.parametrize("years", [0, -1, 0.5])
+def test_project_rejects_timeframes_under_a_year(years):
+    with pytest.raises(ValueError):
+        project(100000, years)
+
+
+def test_negative_returns_need_a_larger_saving():
+    flat, negative, positive = required_monthly_saving(1e6, 10, 0.0, np.array([0.0, -0.05, 0.05]))
+    assert negative > flat > positive
+
+
+def test_scenario_grid_leaves_out_short_timeframes():
+    assert scenario_grid(500000, 1)["Years"].min() >= 1
@@ -0,0 +1,19 @@
+import pandas as pd
+from tax_batch import process_chunk
+
+
+def test_bad_taxable_income_is_reported_with_its_value():
+    chunk = pd.DataFrame({"taxable_income": ["900000", "12,00,000", None],
+                          "rent_paid": [0, 0, 0], "hra_claimed": ["no", "yes", "0"]})
+    result = process_chunk(chunk)
+    assert result["error"].tolist() == ["", "non-numeric taxable_income: '12,00,000'",
+                                        "missing taxable_income"]
+    assert result["tax_new"].iloc[0] == 41600.0
+    assert result["tax_new"].iloc[1:].isna().all()
+
+
+def test_missing_optional_columns_take_defaults():
+    result = process_chunk(pd.DataFrame({"taxable_income": [750000]}))
+    assert result.loc[0, "error"] == ""
+    assert result.loc[0, "best_regime"] == "new"
+    assert result.loc[0, "rent_paid"] == 0 and not result.loc[0, "hra_claimed"]
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tax_calc import REGIME_TABLE, compute_tax, compare_regimes
+
+
+def total(regime, taxable):
+    return float(REGIME_TABLE[regime].tax(np.array([taxable], dtype=float))["total_tax"][0])
+
+
+def pre_cess(regime, taxable):
+    return total(regime, taxable) / 1.04
+
+
+def row(income, rent=0, sec_80c=0, sec_80d=0):
+    return {"taxable_income": income, "rent_paid": rent, "investment_80c": sec_80c,
+            "health_insurance": sec_80d}
+
+
+@pytest.mark.parametrize("regime, taxable, expected", [
+    ("new", 300000, 0),
+    ("new", 600000, 15000),
+    ("new", 700000, 25000),
+    ("new", 1500000, 150000),
+    ("new", 2000000, 300000),
+    ("old", 250000, 0),
+    ("old", 500000, 12500),
+    ("old", 1000000, 112500),
+    ("old", 1200000, 172500),
+])
+def test_slab_tax(regime, taxable, expected):
+    assert REGIME_TABLE[regime].slab_tax(np.array([taxable], dtype=float))[0] == pytest.approx(expected)
+
+
+def test_87a_rebate_up_to_7l_new_regime():
+    assert total("new", 700000) == 0
+    # Gross 7.5L is exactly 7L after the standard deduction
+    assert compute_tax(row(750000), "new")["total_tax"].iloc[0] == 0
+
+
+def test_87a_marginal_relief_new_regime():
+    # 26,000 of slab tax, but only 10,000 of income above 7L
+    assert total("new", 710000) == pytest.approx(10000 * 1.04)
+    for taxable in range(700001, 740000, 1000):
+        assert pre_cess("new", taxable) <= taxable - 700000 + 1e-6
+    # Relief has run out well before 8L
+    assert total("new", 800000) == pytest.approx(35000 * 1.04)
+
+
+def test_87a_rebate_old_regime_has_no_marginal_relief():
+    assert total("old", 500000) == 0
+    assert total("old", 500001) == pytest.approx(12500.2 * 1.04)
+
+
+@pytest.mark.parametrize("regime", ["new", "old"])
+@pytest.mark.parametrize("threshold", [5000000, 10000000])
+def test_surcharge_marginal_relief(regime, threshold):
+    at_threshold = pre_cess(regime, threshold)
+    for excess in (1, 1000, 10000, 50000):
+        assert pre_cess(regime, threshold + excess) <= at_threshold + excess + 1e-6
+
+
+def test_surcharge_values_around_50l_and_1cr():
+    assert total("new", 5000000) == pytest.approx(1200000 * 1.04)
+    # 1,203,000 slab tax; surcharge capped at 7,000 by marginal relief
+    assert total("new", 5010000) == pytest.approx(1210000 * 1.04)
+    # Far enough above the threshold the full 10% applies
+    assert total("new", 6000000) == pytest.approx(1500000 * 1.10 * 1.04)
+    assert total("new", 10000000) == pytest.approx(2700000 * 1.10 * 1.04)
+    assert total("new", 10010000) == pytest.approx(2980000 * 1.04)
+
+
+def test_compute_tax_takes_frames_and_scalars():
+    frame = pd.DataFrame([row(750000), row(1000000, rent=300000, sec_80c=150000, sec_80d=25000)],
+                         index=["a", "b"])
+    result = compute_tax(frame, "old")
+    assert list(result.index) == ["a", "b"]
+    assert result.loc["b", "deductions"] == 425000
+    assert result.loc["b", "total_tax"] == pytest.approx(27500 * 1.04)
+    assert compute_tax(row(750000), "old")["total_tax"].iloc[0] == pytest.approx(result.loc["a", "total_tax"])
+
+
+def test_compare_regimes():
+    frame = pd.DataFrame([row(750000), row(1000000, rent=300000, sec_80c=150000, sec_80d=25000)])
+    result = compare_regimes(frame)
+    assert list(result["best_regime"]) == ["new", "old"]
+    assert result["new"].tolist() == pytest.approx([0, 52500 * 1.04])
+    assert result["old"].tolist() == pytest.approx([52500 * 1.04, 27500 * 1.04])
+    assert result["saving"].tolist() == pytest.approx([54600, 26000])
+
+
+@pytest.mark.parametrize("gross", [749999, 750000, 750001, 5049999, 5050000, 5050001,
+                                   10049999, 10050000, 10050001])
+def test_compare_regimes_matches_compute_tax_at_boundaries(gross):
+    result = compare_regimes(row(gross)).iloc[0]
+    for regime in REGIME_TABLE:
+        assert result[regime] == pytest.approx(compute_tax(row(gross), regime)["total_tax"].iloc[0])
+    assert result["best_regime"] == min(REGIME_TABLE, key=lambda r: result[r])
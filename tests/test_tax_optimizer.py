@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tax_optimizer import optimize, optimize_batch
+
+USER = {"taxable_income": 1400000, "rent_paid": 240000, "hra_claimed": False,
+        "investment_80c": 50000, "health_insurance": 0}
+
+
+def random_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "taxable_income": rng.integers(300_000, 5_000_000, n),
+        "rent_paid": rng.choice([0, 120_000, 360_000], n),
+        "hra_claimed": rng.random(n) < 0.5,
+        "investment_80c": rng.choice([0, 50_000, 150_000], n),
+        "health_insurance": rng.choice([0, 25_000], n),
+        "budget": rng.choice([0, 25_000, 100_000, 200_000], n),
+    })
+
+
+def test_options_are_ranked_and_within_limits():
+    options = optimize(USER, budget=200000)
+    assert len(options) == 3
+    taxes = [o["tax"] for o in options]
+    assert taxes == sorted(taxes)
+    for option in options:
+        assert option["spend"] <= 200000
+        assert option["extra_80c"] <= 100000 and option["extra_80d"] <= 25000
+
+
+def test_zero_budget_keeps_current_tax():
+    best = optimize(USER, budget=0)[0]
+    assert best["spend"] == 0
+    assert best["saving"] >= 0
+
+
+def test_batch_matches_single_row_optimizer():
+    frame = random_frame(300)
+    batch = optimize_batch(frame.drop(columns="budget"), frame["budget"].to_numpy())
+    for i, data in enumerate(frame.to_dict("records")):
+        budget = data.pop("budget")
+        best = optimize(data, budget)[0]
+        assert batch["tax"].iloc[i] == pytest.approx(best["tax"], abs=0.01), data
+        assert batch["saving"].iloc[i] == pytest.approx(best["saving"], abs=0.01), data
+        assert batch["extra_80c"].iloc[i] + batch["extra_80d"].iloc[i] <= budget
@@ -0,0 +1,83 @@
+import time
+import threading
+import pytest
+from ttl_cache import TTLCache, MemoryBackend, SQLiteBackend
+
+
+def test_entries_expire():
+    cache = TTLCache(0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(60)
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_loader_errors_are_not_cached():
+    cache = TTLCache(60)
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert cache.get_or_load("k", lambda: "ok") == "ok"
+
+
+class SlowGetBackend(MemoryBackend):
+    """MemoryBackend that pauses between finding an entry and touching it"""
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        time.sleep(0.0005)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+
+def test_loads_that_evict_do_not_race_with_reads():
+    # Tiny LRU, so nearly every load evicts a key another thread is reading
+    cache = TTLCache(60, SlowGetBackend(maxsize=2))
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(200):
+                cache.get_or_load((i + offset) % 5, lambda: time.sleep(0.0002) or i)
+                cache.get((i + offset + 1) % 5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_sqlite_backend_keeps_entries_and_bounds_size(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TTLCache(60, SQLiteBackend(path, maxsize=2))
+    for key in "abc":
+        cache.set(key, {"key": key})
+    assert len(cache.backend) == 2
+    assert TTLCache(60, SQLiteBackend(path)).get("c") == {"key": "c"}
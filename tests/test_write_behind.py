@@ -0,0 +1,65 @@
+import threading
+
+from pymongo.errors import BulkWriteError
+
+from write_behind import WriteBehindBuffer
+
+
+class SlowCollection:
+    """Stands in for a Mongo collection whose bulk_write blocks until released"""
+
+    full_name = "test.finance"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.docs = {}
+
+    def bulk_write(self, requests, ordered=False):
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise BulkWriteError({"writeErrors": [{"index": i} for i in range(len(requests))]})
+        for request in requests:
+            doc = request._doc["$set"]
+            self.docs.setdefault(tuple(sorted(request._filter.items())), {}).update(doc)
+
+
+def make_buffer(**kwargs):
+    # Long interval so only the test triggers flushes
+    return WriteBehindBuffer(flush_interval=60, **kwargs)
+
+
+def test_pending_fields_visible_while_write_in_flight():
+    buffer, collection = make_buffer(), SlowCollection()
+    buffer.upsert(collection, {"user_id": "u1"}, {"age": 30})
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    assert collection.started.wait(5)
+
+    assert buffer.pending_fields(collection, {"user_id": "u1"}) == {"age": 30}
+    buffer.upsert(collection, {"user_id": "u1"}, {"income": 50000})
+    assert buffer.pending_fields(collection, {"user_id": "u1"}) == {"age": 30, "income": 50000}
+
+    collection.release.set()
+    flusher.join(5)
+    assert collection.docs[(("user_id", "u1"),)] == {"age": 30}
+    assert buffer.pending_fields(collection, {"user_id": "u1"}) == {"income": 50000}
+    metrics = buffer.metrics()
+    assert metrics["flushed"] == 1 and metrics["batches"] == 1 and metrics["pending"] == 1
+    buffer.close()
+
+
+def test_failed_write_stays_visible_and_is_requeued():
+    buffer, collection = make_buffer(max_attempts=2), SlowCollection(fail=True)
+    collection.release.set()
+    buffer.upsert(collection, {"user_id": "u1"}, {"age": 30})
+    buffer.flush()
+
+    assert buffer.pending_fields(collection, {"user_id": "u1"}) == {"age": 30}
+    assert buffer.metrics()["retried"] == 1
+    buffer.flush()
+    assert buffer.pending_fields(collection, {"user_id": "u1"}) == {}
+    assert buffer.metrics()["failed"] == 1
+    buffer.close()
@@ -0,0 +1,165 @@
+import json
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """In-process store, least recently used entries go first once `maxsize` is hit"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while self.maxsize and len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Entries pickled into a SQLite file so they survive restarts"""
+
+    def __init__(self, path, maxsize=10000):
+        self.path = path
+        self.maxsize = maxsize
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, used_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)")
+
+    def get(self, key):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cache SET used_at = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), expires_at, time.time()),
+            )
+            if self.maxsize:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                    "ORDER BY used_at DESC LIMIT -1 OFFSET ?)", (self.maxsize,)
+                )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """Cache with per-entry expiry and single-flight loading.
+
+    When several threads miss on the same key at once only the first one runs
+    the loader; the others wait for its result instead of hitting upstream too.
+    Loader errors are handed to every waiter and never cached.
+    """
+
+    def __init__(self, ttl, backend=None):
+        self.ttl = ttl
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts, **params):
+        return json.dumps([parts, params], sort_keys=True, default=str)
+
+    def get_or_load(self, key, loader, ttl=None):
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is not None and entry[1] > time.time():
+                self.hits += 1
+                return entry[0]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                self.misses += 1
+                call = self._inflight[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        loaded = False
+        try:
+            call.value = loader()
+            loaded = True
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # Stored under the lock like every other backend access: a set
+            # that evicts must not interleave with another thread's get
+            with self._lock:
+                if loaded:
+                    self.backend.set(key, call.value, time.time() + (self.ttl if ttl is None else ttl))
+                del self._inflight[key]
+            call.done.set()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is not None and entry[1] > time.time():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self.backend.set(key, value, time.time() + (self.ttl if ttl is None else ttl))
+
+    def invalidate(self, key):
+        with self._lock:
+            self.backend.delete(key)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "size": len(self.backend)}
@@ -0,0 +1,296 @@
+import os
+import re
+import math
+import time
+import wave
+import struct
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from ttl_cache import TTLCache, MemoryBackend, SQLiteBackend
+
+# Same status names as plan_jobs, plus cancelled
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+# "pyttsx3" (offline, system voices), "gtts" (Google, needs network) or
+# "tone" (offline beeps, for tests and machines without a voice)
+TTS_ENGINE = os.getenv("TTS_ENGINE", "pyttsx3")
+# Texts synthesized at the same time
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+# Synthesized audio is reused for the same text for this long (seconds)
+TTS_CACHE_TTL = float(os.getenv("TTS_CACHE_TTL", str(24 * 3600)))
+TTS_CACHE_SIZE = int(os.getenv("TTS_CACHE_SIZE", "64"))
+# Set to a file path to keep synthesized audio across restarts
+TTS_CACHE_DB = os.getenv("TTS_CACHE_DB")
+# Failed and cancelled jobs are forgotten after this long (seconds)
+TTS_JOB_TTL = float(os.getenv("TTS_JOB_TTL", "3600"))
+# Long texts are read in chunks of about this many characters; the first
+# one is kept short so playback can start as soon as possible
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "600"))
+TTS_FIRST_CHUNK_CHARS = int(os.getenv("TTS_FIRST_CHUNK_CHARS", "150"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?:;])\s+|\n+")
+
+
+class Pyttsx3Engine:
+    name = "pyttsx3"
+    format = "wav"
+
+    def synthesize_to_file(self, text, path):
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+
+
+class GTTSEngine:
+    name = "gtts"
+    format = "mp3"
+
+    def __init__(self, lang="en"):
+        self.lang = lang
+
+    def synthesize_to_file(self, text, path):
+        from gtts import gTTS
+        gTTS(text, lang=self.lang).save(path)
+
+
+class ToneEngine:
+    """A short beep per word, written with the standard library only"""
+    name = "tone"
+    format = "wav"
+
+    def __init__(self, rate=8000, seconds_per_word=0.05, latency_per_word=0.0):
+        self.rate = rate
+        self.seconds_per_word = seconds_per_word
+        # Simulated synthesis time, to stand in for a real voice in benchmarks
+        self.latency_per_word = latency_per_word
+
+    def synthesize_to_file(self, text, path):
+        time.sleep(self.latency_per_word * len(text.split()))
+        samples_per_word = int(self.rate * self.seconds_per_word)
+        beep = struct.pack(f"<{samples_per_word}h", *(
+            int(8000 * math.sin(2 * math.pi * 440 * i / self.rate)) for i in range(samples_per_word)))
+        with wave.open(path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.rate)
+            out.writeframes(beep * len(text.split()))
+
+
+ENGINES = {"pyttsx3": Pyttsx3Engine, "gtts": GTTSEngine, "tone": ToneEngine}
+
+
+def get_engine(name=TTS_ENGINE):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine: {name}")
+    return ENGINES[name]()
+
+
+def default_tts_cache():
+    if TTS_CACHE_DB:
+        backend = SQLiteBackend(TTS_CACHE_DB, maxsize=TTS_CACHE_SIZE)
+    else:
+        backend = MemoryBackend(maxsize=TTS_CACHE_SIZE)
+    return TTLCache(TTS_CACHE_TTL, backend)
+
+
+_SPAWN = multiprocessing.get_context("spawn")
+
+
+def split_text(text, chunk_chars=TTS_CHUNK_CHARS, first_chunk_chars=TTS_FIRST_CHUNK_CHARS):
+    """Split `text` at sentence and line ends into chunks to synthesize separately.
+
+    Sentences are packed into chunks of up to `chunk_chars` characters (the
+    first up to `first_chunk_chars`); a sentence longer than that becomes a
+    chunk of its own.
+    """
+    chunks, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        limit = first_chunk_chars if not chunks else chunk_chars
+        if current and len(current) + 1 + len(sentence) > limit:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _synthesize(engine, text, path):
+    engine.synthesize_to_file(text, path)
+
+
+class TTSService:
+    """Text-to-speech off the Streamlit thread, with audio cached by text.
+
+    `submit` returns a job id at once; the text is synthesized to a file on
+    a worker and the UI polls `get` for the audio bytes. With `isolate`
+    (the default) every synthesis runs in a child process, so `cancel`
+    stops it mid-way by terminating that process.
+
+    Finished audio lives only in `cache`, so TTS_CACHE_SIZE bounds the
+    memory it takes; `_jobs` only tracks jobs still in flight and, for a
+    while, the ones that failed or were cancelled.
+    """
+
+    def __init__(self, engine=None, cache=None, max_workers=TTS_WORKERS, isolate=True, job_ttl=TTS_JOB_TTL):
+        self.engine = engine if engine is not None else get_engine()
+        self.cache = cache if cache is not None else default_tts_cache()
+        self.isolate = isolate
+        self.job_ttl = job_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+    def job_id(self, text):
+        return hashlib.sha256(f"{self.engine.name}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [j for j, job in self._jobs.items()
+                       if job["status"] in (FAILED, CANCELLED) and job["updated_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, text):
+        job_id = self.job_id(text)
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] in (PENDING, RUNNING):
+                return job_id
+            if self.cache.get(job_id) is not None:
+                self._jobs.pop(job_id, None)
+                return job_id
+            job = self._jobs[job_id] = {"status": PENDING, "error": "", "process": None,
+                                        "updated_at": time.time()}
+        self._pool.submit(self._run, job_id, job, text)
+        return job_id
+
+    def submit_chunks(self, text):
+        """Submit `text` as ordered chunks and return their job ids.
+
+        The pool takes jobs first in, first out, so earlier chunks are
+        synthesized first and later ones while the first are playing. Each
+        chunk is cached on its own, so shared sentences are reused too.
+        """
+        return [self.submit(chunk) for chunk in split_text(text)]
+
+    def cancel_all(self, job_ids):
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def _run(self, job_id, job, text):
+        fd, path = tempfile.mkstemp(suffix="." + self.engine.format)
+        os.close(fd)
+        try:
+            with self._lock:
+                if job["status"] != PENDING:
+                    return
+                job["status"] = RUNNING
+                if self.isolate:
+                    # Started under the lock, so cancel always sees a live process.
+                    # Spawned, since forking from a pool thread is not reliable.
+                    process = _SPAWN.Process(target=_synthesize, args=(self.engine, text, path),
+                                                      daemon=True)
+                    process.start()
+                    job["process"] = process
+            if self.isolate:
+                process.join()
+                if process.exitcode != 0:
+                    raise RuntimeError(f"{self.engine.name} exited with code {process.exitcode}")
+            else:
+                _synthesize(self.engine, text, path)
+            with open(path, "rb") as f:
+                audio = f.read()
+            with self._lock:
+                # Cache first, then drop the job, so `get` always finds one of them
+                if job["status"] != CANCELLED:
+                    self.cache.set(job_id, audio)
+                    if self._jobs.get(job_id) is job:
+                        del self._jobs[job_id]
+        except Exception as e:
+            self._finish(job, status=FAILED, error=str(e))
+        finally:
+            os.remove(path)
+
+    def _finish(self, job, **fields):
+        # Updates this run's job only, a resubmission after cancel has its own
+        with self._lock:
+            if job["status"] == CANCELLED:
+                return False
+            job.update(fields, process=None, updated_at=time.time())
+            return True
+
+    def get(self, job_id):
+        """Status of a job, with the audio bytes once it is done; None if unknown or evicted"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return {"status": job["status"], "audio": None, "error": job["error"],
+                        "format": self.engine.format}
+        audio = self.cache.get(job_id)
+        if audio is None:
+            return None
+        return {"status": DONE, "audio": audio, "error": "", "format": self.engine.format}
+
+    def cancel(self, job_id):
+        """Stop a pending or running synthesis; finished audio stays cached"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in (PENDING, RUNNING):
+                return False
+            job.update(status=CANCELLED, updated_at=time.time())
+            process = job["process"]
+        if process is not None and process.is_alive():
+            process.terminate()
+        return True
+
+    def wait(self, job_id, poll_interval=0.2, on_poll=None):
+        """Poll until the job is done, failed or cancelled, calling `on_poll()` in between"""
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] not in (PENDING, RUNNING):
+                return job
+            if on_poll is not None:
+                on_poll()
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    # Time until the first audio is ready, whole text against chunks, with
+    # the tone engine slowed to roughly the pace of an offline voice
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--latency-per-word", type=float, default=0.01)
+    args = parser.parse_args()
+
+    sentence = "Step {} is to put a fixed part of every salary into a diversified index fund."
+    text = " ".join(sentence.format(i) for i in range(args.words // len(sentence.split())))
+    engine = ToneEngine(latency_per_word=args.latency_per_word)
+
+    service = TTSService(engine, cache=TTLCache(0, MemoryBackend(1)))
+    started = time.perf_counter()
+    service.wait(service.submit(text), poll_interval=0.01)
+    whole = time.perf_counter() - started
+
+    service = TTSService(engine, cache=TTLCache(0, MemoryBackend(1)))
+    started = time.perf_counter()
+    job_ids = service.submit_chunks(text)
+    service.wait(job_ids[0], poll_interval=0.01)
+    first = time.perf_counter() - started
+    for job_id in job_ids:
+        service.wait(job_id, poll_interval=0.01)
+    total = time.perf_counter() - started
+
+    print(f"{args.words} words, {len(job_ids)} chunks")
+    print(f"whole text:  first audio after {whole:6.2f} s")
+    print(f"chunked:     first audio after {first:6.2f} s, all chunks after {total:6.2f} s")
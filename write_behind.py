@@ -0,0 +1,163 @@
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Flush pending upserts at least this often (seconds)
+FLUSH_INTERVAL = 1.0
+# Flush early once this many documents are waiting
+MAX_BATCH = 500
+# Writers wait for the flusher above this many pending documents
+MAX_PENDING = 10000
+# Attempts per document before it is dropped and counted as failed
+MAX_ATTEMPTS = 3
+
+
+class WriteBehindBuffer:
+    """Collects `$set` upserts and writes them to Mongo in the background.
+
+    Repeated writes to the same document are merged while they wait, so a
+    burst of conversation steps costs one bulk_write per collection rather
+    than one round-trip per step. Pending writes are flushed on a timer,
+    when MAX_BATCH documents are waiting, and at interpreter exit.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH,
+                 max_pending=MAX_PENDING, max_attempts=MAX_ATTEMPTS):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = OrderedDict()
+        # Entries handed to bulk_write but not acknowledged yet
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._closed = False
+        self._stats = {"queued": 0, "merged": 0, "flushed": 0, "batches": 0, "retried": 0,
+                       "failed": 0, "blocked": 0, "last_error": "", "last_flush_ms": 0.0}
+        self._thread = threading.Thread(target=self._run, name="mongo-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _key(collection, filter):
+        return collection.full_name, tuple(sorted(filter.items()))
+
+    def upsert(self, collection, filter, fields):
+        key = self._key(collection, filter)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                # Back-pressure: wait for the flusher rather than grow without bound
+                self._stats["blocked"] += 1
+                self._wake.set()
+                self._space.wait_for(lambda: len(self._pending) < self.max_pending or self._closed)
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = {"collection": collection, "filter": dict(filter),
+                                      "set": dict(fields), "attempts": 0}
+            else:
+                entry["set"].update(fields)
+                self._stats["merged"] += 1
+            self._stats["queued"] += 1
+            if len(self._pending) >= self.max_batch:
+                self._wake.set()
+        if self._closed:
+            # Shutting down, nobody else will flush this
+            self.flush()
+
+    def pending_fields(self, collection, filter):
+        """Fields written but not flushed yet, for read-your-writes lookups"""
+        key = self._key(collection, filter)
+        with self._lock:
+            fields = {}
+            for source in (self._inflight, self._pending):
+                entry = source.get(key)
+                if entry is not None:
+                    fields.update(entry["set"])
+            return fields
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, OrderedDict()
+            # Keep the batch readable until Mongo has it
+            self._inflight.update(batch)
+            self._space.notify_all()
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        by_collection = {}
+        for key, entry in batch.items():
+            by_collection.setdefault(entry["collection"].full_name, []).append((key, entry))
+
+        failed = []
+        for entries in by_collection.values():
+            collection = entries[0][1]["collection"]
+            requests = [UpdateOne(e["filter"], {"$set": e["set"]}, upsert=True) for _, e in entries]
+            bad, message = set(), ""
+            try:
+                collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                bad = {error["index"] for error in e.details.get("writeErrors", [])}
+                message = str(e)
+            except Exception as e:
+                bad = set(range(len(entries)))
+                message = str(e)
+            with self._lock:
+                for i, (key, entry) in enumerate(entries):
+                    if i in bad:
+                        failed.append((key, entry))
+                    elif self._inflight.get(key) is entry:
+                        del self._inflight[key]
+                self._stats["flushed"] += len(entries) - len(bad)
+                self._stats["batches"] += 1
+                if message:
+                    self._stats["last_error"] = message
+        with self._lock:
+            self._stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+        self._requeue(failed)
+
+    def _requeue(self, failed):
+        with self._lock:
+            for key, entry in failed:
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+                entry["attempts"] += 1
+                if entry["attempts"] >= self.max_attempts:
+                    self._stats["failed"] += 1
+                    continue
+                self._stats["retried"] += 1
+                newer = self._pending.get(key)
+                if newer is not None:
+                    # Writes made since keep precedence over the failed ones
+                    entry["set"].update(newer["set"])
+                self._pending[key] = entry
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                with self._lock:
+                    self._stats["last_error"] = str(e)
+
+    def close(self):
+        """Stop the flusher and write out whatever is still pending"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+        with self._lock:
+            self._space.notify_all()
+
+    def metrics(self):
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending)}